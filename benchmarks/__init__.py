@@ -0,0 +1,6 @@
+"""
+PromptShield Benchmarks
+
+Scaling benchmarks for the pattern matching stack (pattern_scaling.py)
+and semantic embedding search (semantic_ann.py).
+"""
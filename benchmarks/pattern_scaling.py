@@ -0,0 +1,329 @@
+"""
+Pattern-DB Scaling Benchmark
+
+Measures how the pattern stack scales with DB size and input length:
+- PatternManager.match (full and early_exit) and match_many
+- methods.pattern_match
+- Shield.fast().protect_input (prediction cache off: the same input is
+  timed repeatedly, so a cache would only measure its own hits)
+
+For every DB size: load time, RSS before/after load, peak RSS, and per
+input length p50/p99 latency and throughput. Each DB size runs in a fresh
+subprocess so memory numbers are not polluted by earlier runs.
+
+Usage:
+    python -m benchmarks.pattern_scaling
+    python -m benchmarks.pattern_scaling --sizes 100,10000,1000000 --output after.json
+    python -m benchmarks.pattern_scaling --compare before.json --output after.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .synthetic_db import generate_attack_db, generate_input
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_DB = os.path.join(REPO_ROOT, "promptshield", "attack_db")
+
+DEFAULT_SIZES = "shipped,100,1000,10000"
+FULL_SIZES = "shipped,100,1000,10000,100000,1000000"
+DEFAULT_LENGTHS = "50,500,5000,100000"
+BATCH_SIZE = 64
+
+
+# ========================================
+# Measurement helpers
+# ========================================
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident = int(f.read().split()[1])
+        return resident * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _time_calls(
+    fn: Callable[[], object],
+    iterations: int,
+    budget_s: float,
+    per_call: int = 1
+) -> Dict:
+    """
+    Call fn up to `iterations` times (at least 3, within budget_s). If the
+    warm-up call alone exceeds the budget, it is the only sample.
+    """
+    start = time.perf_counter()
+    fn()  # warm caches (lazy indexes, regex compilation)
+    warmup = time.perf_counter() - start
+
+    if warmup > budget_s:
+        latencies = [warmup / per_call]
+    else:
+        latencies = []
+        deadline = time.perf_counter() + budget_s
+        while len(latencies) < iterations:
+            start = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - start) / per_call)
+            if len(latencies) >= 3 and time.perf_counter() > deadline:
+                break
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "n": len(latencies) * per_call,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput_per_s": len(latencies) / total if total else 0.0,
+    }
+
+
+# ========================================
+# Worker (one DB size, fresh process)
+# ========================================
+
+def run_worker(db_dir: str, lengths: List[int], iterations: int, budget_s: float) -> Dict:
+    """Benchmark one pattern DB; stdout noise from the library goes to stderr"""
+    with contextlib.redirect_stdout(sys.stderr):
+        from promptshield import methods
+        from promptshield.shields import Shield
+
+        gc.collect()
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        shield = Shield.fast(pattern_db=db_dir, cache_predictions=False)
+        load_s = time.perf_counter() - start
+        gc.collect()
+        rss_after = _rss_mb()
+
+        manager = shield.pattern_manager
+        result = {
+            "loaded_patterns": len(manager.patterns),
+            "load_s": load_s,
+            "rss_mb_before": rss_before,
+            "rss_mb_after": rss_after,
+            "rss_mb_delta": rss_after - rss_before,
+            "cases": [],
+        }
+
+        for length in lengths:
+            for kind in ("benign", "attack"):
+                text = generate_input(length, attack=kind == "attack")
+                batch = [
+                    generate_input(length, attack=(i % 4 == 0), seed=i)
+                    for i in range(BATCH_SIZE)
+                ]
+                targets = {
+                    "match_full": lambda: manager.match(text, mode="full"),
+                    "match_early_exit": lambda: manager.match(text, mode="early_exit"),
+                    "methods.pattern_match": lambda: methods.pattern_match(text),
+                    "shield_fast.protect_input": lambda: shield.protect_input(text, ""),
+                }
+                for target, fn in targets.items():
+                    stats = _time_calls(fn, iterations, budget_s)
+                    result["cases"].append(
+                        {"target": target, "input_chars": length, "input_kind": kind, **stats}
+                    )
+
+                if kind == "benign":
+                    # Batch of mixed inputs (1 in 4 carries an attack)
+                    stats = _time_calls(
+                        lambda: manager.match_many(batch),
+                        max(3, iterations // BATCH_SIZE), budget_s, per_call=BATCH_SIZE
+                    )
+                    result["cases"].append(
+                        {"target": "match_many", "input_chars": length,
+                         "input_kind": "mixed", **stats}
+                    )
+
+        result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+# ========================================
+# Driver
+# ========================================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _prepare_db(size: str, workdir: str, seed: int) -> Dict:
+    """Path and summary of the DB for one size ("shipped" = bundled attack_db)"""
+    if size == "shipped":
+        return {"size": "shipped", "path": SHIPPED_DB}
+
+    n_patterns = int(size)
+    path = os.path.join(workdir, f"db_{n_patterns}_seed{seed}")
+    marker = os.path.join(path, ".summary")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            summary = json.load(f)
+    else:
+        print(f"  generating {n_patterns} patterns -> {path}", file=sys.stderr)
+        summary = generate_attack_db(path, n_patterns, seed=seed)
+        with open(marker, "w") as f:
+            json.dump(summary, f)
+    return {"size": n_patterns, "path": path, **summary}
+
+
+def run_benchmarks(args) -> Dict:
+    lengths = [int(x) for x in args.lengths.split(",")]
+    sizes = (FULL_SIZES if args.full else args.sizes).split(",")
+    workdir = args.workdir or os.path.join(tempfile.gettempdir(), "promptshield_bench")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "lengths": lengths,
+            "iterations": args.iterations,
+            "budget_s": args.budget,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+
+    for size in sizes:
+        db = _prepare_db(size.strip(), workdir, args.seed)
+        print(f"▶ DB size {db['size']}", file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pattern_scaling", "--worker", db["path"],
+             "--lengths", args.lengths, "--iterations", str(args.iterations),
+             "--budget", str(args.budget)],
+            cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True
+        )
+        if proc.returncode != 0:
+            print(f"⚠️  Worker failed for DB size {db['size']}", file=sys.stderr)
+            results["runs"].append({"db": db, "error": proc.returncode})
+            continue
+
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        results["runs"].append({"db": db, **run})
+        _print_run(db, run)
+
+    return results
+
+
+def _print_run(db: Dict, run: Dict):
+    print(
+        f"\nDB {db['size']}: {run['loaded_patterns']} patterns, load {run['load_s']:.2f}s, "
+        f"RSS +{run['rss_mb_delta']:.1f}MB (peak {run['peak_rss_mb']:.1f}MB)"
+    )
+    print(f"  {'target':<28}{'chars':>8}  {'kind':<7}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for case in run["cases"]:
+        print(
+            f"  {case['target']:<28}{case['input_chars']:>8}  {case['input_kind']:<7}"
+            f"{case['p50_ms']:>10.3f}{case['p99_ms']:>10.3f}{case['throughput_per_s']:>12.0f}"
+        )
+
+
+def _case_key(run: Dict, case: Dict):
+    return (str(run["db"]["size"]), case["target"], case["input_chars"], case["input_kind"])
+
+
+def compare(baseline: Dict, current: Dict):
+    """Print p50/p99 ratios (current / baseline) for cases present in both"""
+    before = {
+        _case_key(run, case): case
+        for run in baseline.get("runs", []) for case in run.get("cases", [])
+    }
+    print(f"\nvs baseline {baseline['meta'].get('git_commit')} (ratio < 1.0 = faster)")
+    print(f"  {'db':>8}  {'target':<28}{'chars':>8}  {'kind':<7}{'p50':>8}{'p99':>8}")
+    for run in current.get("runs", []):
+        for case in run.get("cases", []):
+            old = before.get(_case_key(run, case))
+            if not old or not old["p50_ms"] or not old["p99_ms"]:
+                continue
+            print(
+                f"  {str(run['db']['size']):>8}  {case['target']:<28}{case['input_chars']:>8}  "
+                f"{case['input_kind']:<7}{case['p50_ms'] / old['p50_ms']:>8.2f}"
+                f"{case['p99_ms'] / old['p99_ms']:>8.2f}"
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated DB sizes ('shipped' = bundled attack_db)")
+    parser.add_argument("--full", action="store_true",
+                        help=f"Run the full size ladder ({FULL_SIZES})")
+    parser.add_argument("--lengths", default=DEFAULT_LENGTHS,
+                        help="Comma-separated input lengths in characters")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Max timed calls per case")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Seconds per case before stopping early (min 3 calls)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Where generated DBs are cached")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results JSON to compare against")
+    parser.add_argument("--worker", metavar="DB_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        lengths = [int(x) for x in args.lengths.split(",")]
+        result = run_worker(args.worker, lengths, args.iterations, args.budget)
+        print(json.dumps(result))
+        return 0
+
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
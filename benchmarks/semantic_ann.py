@@ -0,0 +1,186 @@
+"""
+Semantic Search Benchmark
+
+Compares approximate nearest-neighbour search and quantized stores for
+attack embeddings against the brute-force float32 np.dot path used by
+methods.semantic_match:
+- Brute force: exact top-1, latency only
+- IVFIndex at each n_probe: build time, recall@1 vs brute force, latency
+- QuantizedEmbeddings (float16, int8), with and without exact re-ranking:
+  recall@1, latency, resident memory
+
+Embeddings are synthetic (unit-norm vectors around random cluster
+centres, like families of near-duplicate jailbreaks); queries are noisy
+copies of corpus rows, so no embedding model is needed.
+
+Usage:
+    python -m benchmarks.semantic_ann
+    python -m benchmarks.semantic_ann --sizes 100000,500000 --probes 1,4,16 --output ann.json
+    python -m benchmarks.semantic_ann --rerank 8   # quantized: exact re-scores per query
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .pattern_scaling import _git_commit, _time_calls
+
+DEFAULT_SIZES = "10000,100000"
+DEFAULT_PROBES = "1,2,4,8,16,32"
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int, spread: float, seed: int) -> np.ndarray:
+    """(n, dim) float32 unit vectors scattered around `clusters` centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim))
+    vectors = centres[rng.integers(0, clusters, n)] + spread * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def synthetic_queries(embeddings: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    """Noisy copies of random corpus rows (paraphrased attacks)"""
+    rng = np.random.default_rng(seed + 1)
+    queries = embeddings[rng.integers(0, len(embeddings), count)].astype(np.float64)
+    queries += noise * rng.standard_normal(queries.shape) / np.sqrt(queries.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype(np.float32)
+
+
+def _recall(found: List[int], truth: List[int]) -> float:
+    return float(np.mean(np.asarray(found) == np.asarray(truth))) if truth else 0.0
+
+
+def run_size(n: int, args) -> Dict:
+    from promptshield.semantic import QUANTIZATIONS, IVFIndex, QuantizedEmbeddings, exact_search
+
+    embeddings = synthetic_embeddings(n, args.dim, max(1, n // 50), args.spread, args.seed)
+    queries = synthetic_queries(embeddings, args.queries, args.noise, args.seed)
+    truth = [int(exact_search(embeddings, q)[0][0]) for q in queries]
+
+    def query_loop(search):
+        return lambda: [search(q) for q in queries]
+
+    cases = [{
+        "target": "brute_force",
+        "n_probe": None,
+        "recall_at_1": 1.0,
+        "memory_mb": embeddings.nbytes / 2**20,
+        **_time_calls(query_loop(lambda q: exact_search(embeddings, q)),
+                      args.iterations, args.budget, per_call=len(queries)),
+    }]
+
+    start = time.perf_counter()
+    index = IVFIndex(embeddings, seed=args.seed)
+    build_s = time.perf_counter() - start
+
+    index_mb = (embeddings.nbytes + index.centroids.nbytes + index.order.nbytes) / 2**20
+    for n_probe in [int(x) for x in args.probes.split(",")]:
+        found = [int(index.search(q, n_probe=n_probe)[0][0]) for q in queries]
+        cases.append({
+            "target": "ivf",
+            "n_probe": n_probe,
+            "recall_at_1": _recall(found, truth),
+            "memory_mb": index_mb,
+            **_time_calls(query_loop(lambda q: index.search(q, n_probe=n_probe)),
+                          args.iterations, args.budget, per_call=len(queries)),
+        })
+
+    # Re-ranking keeps the float32 source; here it is in memory, so count it
+    for dtype in QUANTIZATIONS:
+        for rerank in sorted({0, args.rerank}):
+            store = QuantizedEmbeddings(embeddings, dtype=dtype, rerank=rerank)
+            found = [int(store.search(q)[0][0]) for q in queries]
+            source_bytes = embeddings.nbytes if store.source is not None else 0
+            cases.append({
+                "target": f"quantized_{dtype}" + (f"_rr{rerank}" if rerank else ""),
+                "n_probe": None,
+                "recall_at_1": _recall(found, truth),
+                "memory_mb": (store.nbytes + source_bytes) / 2**20,
+                **_time_calls(query_loop(store.search),
+                              args.iterations, args.budget, per_call=len(queries)),
+            })
+
+    return {
+        "size": n,
+        "n_lists": index.n_lists,
+        "build_s": build_s,
+        "embeddings_mb": embeddings.nbytes / 2**20,
+        "cases": cases,
+    }
+
+
+def _print_run(run: Dict):
+    print(
+        f"\n{run['size']} embeddings ({run['embeddings_mb']:.1f}MB), "
+        f"IVF {run['n_lists']} lists built in {run['build_s']:.2f}s"
+    )
+    print(
+        f"  {'target':<22}{'n_probe':>8}{'recall@1':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'speedup':>9}{'mem MB':>9}"
+    )
+    brute = run["cases"][0]["p50_ms"]
+    for case in run["cases"]:
+        probe = "-" if case["n_probe"] is None else case["n_probe"]
+        print(
+            f"  {case['target']:<22}{probe:>8}{case['recall_at_1']:>10.3f}"
+            f"{case['p50_ms']:>10.3f}{case['p99_ms']:>10.3f}{brute / case['p50_ms']:>8.1f}x"
+            f"{case['memory_mb']:>9.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes")
+    parser.add_argument("--probes", default=DEFAULT_PROBES, help="Comma-separated IVF n_probe values")
+    parser.add_argument("--rerank", type=int, default=32,
+                        help="Exact re-scores per query for the re-ranked quantized stores")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (MiniLM = 384)")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="Noise around cluster centres (higher = less structure)")
+    parser.add_argument("--noise", type=float, default=1.0,
+                        help="Query noise relative to a unit vector")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Max timed passes over the query set per case")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Seconds per case before stopping early (min 3 passes)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            **{k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "runs": [],
+    }
+
+    for size in args.sizes.split(","):
+        print(f"▶ {size.strip()} embeddings", file=sys.stderr)
+        run = run_size(int(size), args)
+        results["runs"].append(run)
+        _print_run(run)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
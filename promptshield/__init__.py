@@ -26,6 +26,7 @@ __version__ = "2.1.4"
 
 # New configurable Shield (recommended)
 from .shields import Shield, register_component, ShieldComponent
+from .analyzed_text import AnalyzedText
 
 # Legacy shields (deprecated but supported)
 from .shields import InputShield_L5, OutputShield_L5, AgentShield_L3
@@ -54,6 +55,7 @@ from .security import (
 # Advanced components
 from .pattern_manager import PatternManager
 from .rate_limiting import AdaptiveRateLimiter
+from .prediction_cache import PredictionCache
 from .session_anomaly import SessionAnomalyDetector
 
 # PII detection
@@ -76,6 +78,7 @@ __all__ = [
     "Shield",
     "register_component",
     "ShieldComponent",
+    "AnalyzedText",
     
     # Legacy shields (deprecated)
     "InputShield_L5",
@@ -102,6 +105,7 @@ __all__ = [
     # Components
     "PatternManager",
     "AdaptiveRateLimiter",
+    "PredictionCache",
     "SessionAnomalyDetector",
     "ContextualPIIDetector",
     "PIIContext",
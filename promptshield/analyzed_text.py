@@ -0,0 +1,104 @@
+"""
+Analyzed Text
+
+One request's input plus lazily memoized views of it. Shield builds an
+AnalyzedText once per protect_input() call and hands the same object to
+every stage (patterns, ML, session tracking, custom components), so each
+view is computed at most once per request:
+- lower: text.lower(), what pattern matching and keyword checks use
+- words / tokens(min_len): whitespace tokens of the lowercased text
+- normalized: NFKC, zero-width characters removed, whitespace collapsed
+- decoded: URL / base64 decoded variant (see methods.decode_text)
+- sanitized: normalized, then decoded (what methods.sanitize_text returns)
+- decoded_spans: payloads decoded from encoded spans (methods.decode_spans)
+- derive(key, compute): any other per-request feature (TF-IDF vector,
+  embedding, ...) shared between components
+
+Usage:
+    analyzed = AnalyzedText.of(user_input)
+    analyzed.lower
+    analyzed.word_set(3)
+    X = analyzed.derive("tfidf", lambda: vectorizer.transform([analyzed.text]))
+"""
+
+from functools import cached_property
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Tuple, Union
+
+
+class AnalyzedText:
+    """
+    Input text with views computed on first use and then reused.
+
+    Views are plain attributes after the first access, so repeated reads
+    cost a dict lookup. An AnalyzedText belongs to one request; it is not
+    meant to be shared across threads while views are being filled in.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._derived: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def of(cls, text: Union[str, "AnalyzedText"]) -> "AnalyzedText":
+        """Wrap a str, or return an AnalyzedText unchanged"""
+        return text if isinstance(text, cls) else cls(text)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def words(self) -> Tuple[str, ...]:
+        """Whitespace tokens of the lowercased text, in order"""
+        return tuple(self.lower.split())
+
+    def tokens(self, min_len: int) -> Tuple[str, ...]:
+        """Lowercased words of min_len+ characters, in order (with repeats)"""
+        return self.derive(
+            ("tokens", min_len),
+            lambda: tuple(w for w in self.words if len(w) >= min_len)
+        )
+
+    def word_set(self, min_len: int) -> FrozenSet[str]:
+        """Distinct lowercased words of min_len+ characters"""
+        return self.derive(
+            ("word_set", min_len), lambda: frozenset(self.tokens(min_len))
+        )
+
+    @cached_property
+    def normalized(self) -> str:
+        from .methods import normalize_text
+        return normalize_text(self.text)
+
+    @cached_property
+    def decoded(self) -> str:
+        from .methods import decode_text
+        return decode_text(self.text)
+
+    @cached_property
+    def sanitized(self) -> str:
+        from .methods import decode_text
+        return decode_text(self.normalized)
+
+    @cached_property
+    def decoded_spans(self) -> Tuple[str, ...]:
+        from .methods import decode_spans
+        return tuple(decode_spans(self.text))
+
+    def derive(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Memoize compute() under key for the rest of the request"""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = compute()
+            return value
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        preview = self.text if len(self.text) <= 40 else self.text[:37] + "..."
+        return f"AnalyzedText({preview!r})"
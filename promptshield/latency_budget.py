@@ -0,0 +1,138 @@
+"""
+Latency Budget
+
+Deadline-aware stage scheduling for Shield:
+- StageCostEstimator keeps an exponentially weighted moving average of
+  how long each stage takes (updated on every run, deadline or not)
+- LatencyBudget is one request's deadline: a stage runs only if its
+  estimated cost fits in the time left; otherwise it is skipped (or the
+  caller downgrades it) and the request is reported as degraded
+
+Usage:
+    costs = StageCostEstimator()
+    budget = LatencyBudget(deadline_ms=5.0, estimator=costs)
+    
+    if budget.allows("ml"):
+        with budget.track("ml"):
+            score = run_models(text)
+    
+    budget.report()  # {"degraded": ..., "skipped_stages": [...], ...}
+"""
+
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class StageCostEstimator:
+    """
+    EWMA of observed per-stage latency (ms).
+    
+    Stages never observed estimate to 0.0, so they run once and are
+    measured before they can be skipped. Each skip shrinks the estimate
+    by skip_decay, so one slow outlier does not disable a stage for good:
+    it is retried (and re-measured) once the estimate fits again.
+    """
+    
+    def __init__(self, alpha: float = 0.2, skip_decay: float = 0.02):
+        """
+        Args:
+            alpha: Weight of the newest observation (0-1)
+            skip_decay: Fraction of the estimate dropped per skip (0-1)
+        """
+        self.alpha = alpha
+        self.skip_decay = skip_decay
+        self._costs: Dict[str, List] = {}  # stage: [ewma_ms, samples]
+        self._lock = Lock()
+    
+    def estimate(self, stage: str) -> float:
+        entry = self._costs.get(stage)
+        return entry[0] if entry is not None else 0.0
+    
+    def observe(self, stage: str, elapsed_ms: float):
+        with self._lock:
+            entry = self._costs.get(stage)
+            if entry is None:
+                self._costs[stage] = [elapsed_ms, 1]
+            else:
+                entry[0] += self.alpha * (elapsed_ms - entry[0])
+                entry[1] += 1
+    
+    def skipped(self, stage: str):
+        with self._lock:
+            entry = self._costs.get(stage)
+            if entry is not None:
+                entry[0] *= 1.0 - self.skip_decay
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-stage cost estimate and sample count"""
+        with self._lock:
+            return {
+                stage: {"ewma_ms": ewma, "samples": samples}
+                for stage, (ewma, samples) in sorted(self._costs.items())
+            }
+
+
+class LatencyBudget:
+    """
+    One request's deadline (deadline_ms=None = unlimited, nothing skipped).
+    """
+    
+    def __init__(self, deadline_ms: Optional[float], estimator: StageCostEstimator):
+        self.deadline_ms = deadline_ms
+        self.estimator = estimator
+        self.skipped_stages: List[str] = []
+        self.downgraded_stages: List[str] = []
+        self._start = time.perf_counter()
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+    
+    def remaining_ms(self) -> float:
+        if self.deadline_ms is None:
+            return float("inf")
+        return self.deadline_ms - self.elapsed_ms()
+    
+    def fits(self, stage: str) -> bool:
+        """Would the stage's estimated cost fit in the time left?"""
+        if self.deadline_ms is None:
+            return True
+        return self.estimator.estimate(stage) <= self.remaining_ms()
+    
+    def allows(self, stage: str) -> bool:
+        """fits(), recording the stage as skipped when it does not"""
+        if self.fits(stage):
+            return True
+        self.skipped_stages.append(stage)
+        self.estimator.skipped(stage)
+        return False
+    
+    def downgrade(self, stage: str):
+        """Record that a cheaper variant of the stage ran"""
+        self.downgraded_stages.append(stage)
+    
+    @contextmanager
+    def track(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block into the stage's cost estimate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.estimator.observe(stage, (time.perf_counter() - start) * 1000)
+    
+    def run(self, stage: str, fn: Callable[[], Any]) -> Any:
+        """fn() timed under stage"""
+        with self.track(stage):
+            return fn()
+    
+    @property
+    def degraded(self) -> bool:
+        return bool(self.skipped_stages or self.downgraded_stages)
+    
+    def report(self) -> Dict:
+        return {
+            "degraded": self.degraded,
+            "skipped_stages": list(self.skipped_stages),
+            "downgraded_stages": list(self.downgraded_stages),
+        }
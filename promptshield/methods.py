@@ -9,6 +9,8 @@ import glob
 import os
 import numpy as np
 
+from .analyzed_text import AnalyzedText
+
 # Make sentence_transformers optional
 try:
     from sentence_transformers import SentenceTransformer
@@ -87,24 +89,33 @@ def load_attack_patterns(path="attack_db"):
 
 
 
+# Zero-width & invisible chars
+_ZERO_WIDTH_CHARS = ("\u200B", "\u200C", "\u200D", "\uFEFF")
+_ZERO_WIDTH = re.compile(r"[\u200B-\u200D\uFEFF]")
+
+
 def normalize_text(text: str) -> str:
     """
     Normalize unicode, remove zero-width characters,
     and standardize text for further analysis.
+
+    ASCII input (most traffic) is already NFKC and has no zero-width
+    characters, so only whitespace is collapsed.
     """
     if not isinstance(text, str):
         return ""
 
-    # Unicode normalization
-    text = unicodedata.normalize("NFKC", text)
+    if not text.isascii():
+        # Unicode normalization (returns text itself if already NFKC)
+        text = unicodedata.normalize("NFKC", text)
 
-    # Remove zero-width & invisible chars
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", text)
+        # Remove zero-width & invisible chars (substring checks are
+        # much cheaper than a regex pass over clean text)
+        if any(ch in text for ch in _ZERO_WIDTH_CHARS):
+            text = _ZERO_WIDTH.sub("", text)
 
-    # Strip excessive whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-
-    return text
+    # Strip excessive whitespace (split() uses the same whitespace as \s)
+    return " ".join(text.split())
 
 
 
@@ -113,11 +124,18 @@ def normalize_text(text: str) -> str:
 
 
 
+# Only such strings can pass b64decode(validate=True) once padded
+_BASE64_CANDIDATE = re.compile(r"[A-Za-z0-9+/]+={0,2}")
+
+
 def _safe_base64_decode(text: str) -> str:
     """
     Attempt base64 decode safely.
     If it fails, return original text.
     """
+    if not _BASE64_CANDIDATE.fullmatch(text):
+        return text
+
     try:
         padded = text + "=" * (-len(text) % 4)
         decoded = base64.b64decode(padded, validate=True)
@@ -141,8 +159,8 @@ def decode_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
 
-    # URL decode
-    decoded = urllib.parse.unquote(text)
+    # URL decode (only if there is an escape to decode)
+    decoded = urllib.parse.unquote(text) if "%" in text else text
 
     # Base64 decode attempt
     decoded = _safe_base64_decode(decoded)
@@ -150,6 +168,120 @@ def decode_text(text: str) -> str:
     return decoded
 
 
+# ---------- SPAN DECODING ----------
+
+# Candidate spans are found with C-speed checks first (substring tests,
+# str.split); the regexes only run on the few places that can match.
+_TOKEN_SPAN = re.compile(
+    r"(?P<hex>(?:[0-9A-Fa-f]{2}){8,})(?![A-Za-z0-9+/_-])"
+    r"|(?P<base64>[A-Za-z0-9+/_-]{16,}={0,2})"
+)
+_URL_ESCAPE = re.compile(r"%[0-9A-Fa-f]{2}")
+_UNICODE_SPAN = re.compile(r"(?:\\[uU][0-9A-Fa-f]{4})+")
+_HEX_ESCAPE_SPAN = re.compile(r"(?:\\[xX][0-9A-Fa-f]{2}){4,}")
+_ROT13_SPAN = re.compile(r"\brot[-_ ]?13\b[^\w\n]*[^\n]+", re.IGNORECASE)
+_ROT13_MARKER = re.compile(r"^rot[-_ ]?13\b[^\w\n]*", re.IGNORECASE)
+_ROT13 = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
+    "NOPQRSTUVWXYZABCDEFGHIJKLMnopqrstuvwxyzabcdefghijklm"
+)
+_URLSAFE = str.maketrans("-_", "+/")
+
+
+def _readable(decoded: str) -> bool:
+    """Reject decodings that are not text (random words, hashes, ids)"""
+    if len(decoded) < 4:
+        return False
+    printable = sum(1 for ch in decoded if ch.isprintable() or ch.isspace())
+    return printable >= 0.9 * len(decoded)
+
+
+def _decode_span(kind: str, span: str):
+    """Decode one candidate span; None if it does not decode to text"""
+    try:
+        if kind == "base64":
+            # Single-case runs are words or identifiers, not base64
+            if span.islower() or span.isupper():
+                return None
+            span = span.translate(_URLSAFE)
+            raw = base64.b64decode(span + "=" * (-len(span) % 4), validate=True)
+            return raw.decode("utf-8")
+        if kind == "url":
+            return urllib.parse.unquote(span, errors="strict")
+        if kind == "hex":
+            return bytes.fromhex(
+                span.replace("\\x", "").replace("\\X", "")
+            ).decode("utf-8")
+        if kind == "unicode":
+            return span.encode("ascii").decode("unicode_escape")
+        if kind == "rot13":
+            return _ROT13_MARKER.sub("", span).translate(_ROT13)
+    except (ValueError, UnicodeError):
+        return None
+    return None
+
+
+def _candidate_spans(text: str):
+    """(encoding, span) pairs worth decoding, in a few cheap passes"""
+    if "\\" in text:
+        for match in _UNICODE_SPAN.finditer(text):
+            if len(match.group()) >= 12:  # 2+ escapes
+                yield "unicode", match.group()
+        for match in _HEX_ESCAPE_SPAN.finditer(text):
+            yield "hex", match.group()
+
+    if "13" in text:
+        for match in _ROT13_SPAN.finditer(text):
+            yield "rot13", match.group()
+
+    check_url = "%" in text
+    for token in text.split():
+        if check_url and "%" in token and _URL_ESCAPE.search(token):
+            yield "url", token
+        elif len(token) >= 16:
+            for match in _TOKEN_SPAN.finditer(token):
+                yield match.lastgroup, match.group()
+
+
+def decode_spans(text: str, max_depth: int = 3, max_chars: int = 16384) -> list:
+    """
+    Decode encoded payloads embedded anywhere in text.
+
+    Candidate spans (base64 runs of 16+ chars, %XX runs, hex, \\uXXXX
+    escapes, text after a rot13 marker) are located with cheap scanners
+    and only those spans are decoded. Decoded text is scanned again, up
+    to max_depth layers; decoding stops once max_chars of output have
+    been produced, so cost stays bounded on hostile input.
+
+    Returns:
+        Decoded spans, outer layers first (empty for plain text)
+    """
+    if not isinstance(text, str) or not text:
+        return []
+
+    decoded_spans = []
+    budget = max_chars
+    layer = [text]
+
+    for _ in range(max_depth):
+        next_layer = []
+        for source in layer:
+            for kind, span in _candidate_spans(source):
+                decoded = _decode_span(kind, span)
+                if decoded is None or decoded == span or not _readable(decoded):
+                    continue
+                budget -= len(decoded)
+                if budget < 0:
+                    return decoded_spans
+                decoded_spans.append(decoded)
+                next_layer.append(decoded)
+        if not next_layer:
+            break
+        layer = next_layer
+
+    return decoded_spans
+
+
 # ---------- SANITIZER (WRAPPER) ----------
 
 def sanitize_text(text: str) -> str:
@@ -212,8 +344,7 @@ _INSTRUCTION_KEYWORDS = [
 ]
 
 
-def _count_keywords(text: str, keywords: list) -> int:
-    text_l = text.lower()
+def _count_keywords(text_l: str, keywords: list) -> int:
     return sum(1 for k in keywords if k in text_l)
 
 
@@ -223,17 +354,21 @@ def _count_quotes_and_blocks(text: str) -> int:
     return quotes + (code_blocks * 3)
 
 
-def complexity_score(text: str) -> float:
+def complexity_score(text) -> float:
     """
     Returns a risk score between 0.0 and 1.0
     based on structural and linguistic complexity.
+
+    Accepts a str or an AnalyzedText (its lowercased view is reused).
     """
     if not text:
         return 0.0
 
+    analyzed = AnalyzedText.of(text)
+    text = analyzed.text
     length = len(text)
-    imperative_count = _count_keywords(text, _IMPERATIVE_VERBS)
-    instruction_count = _count_keywords(text, _INSTRUCTION_KEYWORDS)
+    imperative_count = _count_keywords(analyzed.lower, _IMPERATIVE_VERBS)
+    instruction_count = _count_keywords(analyzed.lower, _INSTRUCTION_KEYWORDS)
     quote_score = _count_quotes_and_blocks(text)
 
     score = 0.0
@@ -262,19 +397,74 @@ def complexity_score(text: str) -> float:
 
 # Global cache
 _EMBED_MODEL = None
-_ATTACK_EMBEDDINGS = []   # list of np arrays
+_EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+_ATTACK_EMBEDDINGS = []   # (n, dim) float32, memory-mapped when cached on disk; [] when quantized
 _ATTACK_TEXTS = []        # original attack strings
+_ATTACK_INDEX = None      # semantic.IVFIndex when load_semantic_engine(index="ivf")
+_ATTACK_STORE = None      # semantic.QuantizedEmbeddings when load_semantic_engine(quantize=...)
+_SEMANTIC_BATCHER = None  # semantic.MicroBatcher when enable_semantic_batching() was called
 
 # Threshold (tune later)
 _SEMANTIC_THRESHOLD = 0.78
 
+# On-disk embedding cache (override with PROMPTSHIELD_CACHE_DIR)
+DEFAULT_EMBEDDING_CACHE_DIR = os.environ.get(
+    "PROMPTSHIELD_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "promptshield", "embeddings")
+)
+
 
-def load_semantic_engine(attack_texts: list):
+def _get_embed_model():
+    """Load the embedding model on first use"""
+    global _EMBED_MODEL
+    if _EMBED_MODEL is None:
+        _EMBED_MODEL = SentenceTransformer(_EMBED_MODEL_NAME)
+    return _EMBED_MODEL
+
+
+def _encode_texts(texts: list):
+    return _get_embed_model().encode(
+        texts,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
+
+def load_semantic_engine(
+    attack_texts: list,
+    cache_dir=DEFAULT_EMBEDDING_CACHE_DIR,
+    index: str = "exact",
+    n_probe: int = 8,
+    quantize: str = None,
+    rerank: int = 0
+):
     """
     Load embedding model and precompute attack embeddings.
     Run ONCE at startup.
+
+    With cache_dir set, embeddings are persisted per (model, corpus) and
+    memory-mapped on later starts: an unchanged corpus loads without
+    loading the model, and only added/changed texts are ever re-encoded.
+    cache_dir=None encodes everything in memory as before.
+
+    index="ivf" builds an approximate nearest-neighbour index for large
+    corpora; n_probe trades recall for latency (see semantic.IVFIndex).
+
+    quantize="int8" / "float16" scans a quantized copy of the embeddings
+    (index="exact" only) instead of the float32 rows, which are released.
+    rerank > 0 keeps them to re-score the top `rerank` exactly; that only
+    saves memory when they are memory-mapped from cache_dir (see
+    semantic.QuantizedEmbeddings).
     """
-    global _EMBED_MODEL, _ATTACK_EMBEDDINGS, _ATTACK_TEXTS
+    global _ATTACK_EMBEDDINGS, _ATTACK_TEXTS, _ATTACK_INDEX, _ATTACK_STORE
+    
+    from .semantic import ANN_INDEXES, QUANTIZATIONS
+    if index not in ANN_INDEXES:
+        raise ValueError(f"Unknown semantic index: {index} (expected one of {ANN_INDEXES})")
+    if quantize is not None and quantize not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantize} (expected one of {QUANTIZATIONS})")
+    if quantize is not None and index != "exact":
+        raise ValueError("quantize is only supported with index='exact'")
     
     if not SENTENCE_TRANSFORMERS_AVAILABLE:
         print("[WARNING] Sentence transformers not available, skipping semantic engine")
@@ -283,41 +473,118 @@ def load_semantic_engine(attack_texts: list):
     if not attack_texts:
         return
 
-    _EMBED_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-
     _ATTACK_TEXTS = attack_texts
-    embeddings = _EMBED_MODEL.encode(
-        attack_texts,
-        convert_to_numpy=True,
-        normalize_embeddings=True
-    )
+    embeddings = _load_embeddings(attack_texts, cache_dir)
+
+    _ATTACK_INDEX = None
+    if index == "ivf":
+        from .semantic import IVFIndex
+        _ATTACK_INDEX = IVFIndex(embeddings, n_probe=n_probe)
+
+    _ATTACK_STORE = None
+    if quantize is not None:
+        from .semantic import QuantizedEmbeddings
+        _ATTACK_STORE = QuantizedEmbeddings(embeddings, dtype=quantize, rerank=rerank)
+        embeddings = []  # the store keeps the float32 rows only if it re-ranks
 
     _ATTACK_EMBEDDINGS = embeddings
 
 
+def _load_embeddings(attack_texts: list, cache_dir):
+    if cache_dir:
+        from .semantic import EmbeddingCache
+        cache = EmbeddingCache(cache_dir, _EMBED_MODEL_NAME)
+        try:
+            return cache.load(attack_texts, _encode_texts)
+        except OSError as e:
+            print(f"[WARNING] Embedding cache unavailable ({e}), encoding in memory")
+
+    return _encode_texts(attack_texts)
+
+
 def semantic_match(text: str):
     """
     Compare input text against attack embeddings.
     Returns:
         matched (bool), similarity (float)
     """
-    if not SENTENCE_TRANSFORMERS_AVAILABLE or not text or _EMBED_MODEL is None:
+    if not SENTENCE_TRANSFORMERS_AVAILABLE or not text or len(_ATTACK_TEXTS) == 0:
         return False, 0.0
 
-    query_vec = _EMBED_MODEL.encode(
-        [text],
-        convert_to_numpy=True,
-        normalize_embeddings=True
-    )[0]
+    batcher = _SEMANTIC_BATCHER
+    if batcher is not None:
+        return batcher(text)
+
+    return semantic_match_batch([text])[0]
+
+
+async def semantic_match_async(text: str):
+    """semantic_match for asyncio callers (batched when batching is enabled)"""
+    if not SENTENCE_TRANSFORMERS_AVAILABLE or not text or len(_ATTACK_TEXTS) == 0:
+        return False, 0.0
+
+    batcher = _SEMANTIC_BATCHER
+    if batcher is not None:
+        return await batcher.submit_async(text)
+
+    import asyncio
+    return await asyncio.get_running_loop().run_in_executor(None, semantic_match, text)
+
+
+def semantic_match_batch(texts: list):
+    """
+    semantic_match for many texts: one encode() call and one matrix
+    product against the attack embeddings.
+    Returns:
+        list of (matched, similarity), in input order
+    """
+    if not texts or len(_ATTACK_TEXTS) == 0:
+        return [(False, 0.0) for _ in texts]
+
+    query_vecs = _encode_texts(list(texts))
 
     # Cosine similarity via dot product (normalized vectors)
-    sims = np.dot(_ATTACK_EMBEDDINGS, query_vec)
-    max_sim = float(np.max(sims))
+    if _ATTACK_INDEX is not None:
+        max_sims = []
+        for query_vec in query_vecs:
+            _, sims = _ATTACK_INDEX.search(query_vec, k=1)
+            max_sims.append(float(sims[0]) if len(sims) else 0.0)
+    elif _ATTACK_STORE is not None:
+        max_sims = [
+            float(sims[0]) if len(sims) else 0.0
+            for _, sims in _ATTACK_STORE.search_many(query_vecs, k=1)
+        ]
+    else:
+        max_sims = np.max(np.dot(_ATTACK_EMBEDDINGS, query_vecs.T), axis=0).tolist()
+
+    return [(max_sim >= _SEMANTIC_THRESHOLD, max_sim) for max_sim in max_sims]
+
+
+def enable_semantic_batching(max_batch: int = 32, max_wait_ms: float = 2.0):
+    """
+    Route semantic_match calls through a micro-batcher: concurrent calls
+    (threads or asyncio) are encoded together, up to max_batch texts or
+    max_wait_ms after the first one. Returns the batcher (see .stats()).
+    """
+    global _SEMANTIC_BATCHER
+    from .semantic import MicroBatcher
+
+    disable_semantic_batching()
+    _SEMANTIC_BATCHER = MicroBatcher(
+        semantic_match_batch,
+        max_batch=max_batch,
+        max_wait_ms=max_wait_ms,
+        name="promptshield-semantic"
+    )
+    return _SEMANTIC_BATCHER
 
-    if max_sim >= _SEMANTIC_THRESHOLD:
-        return True, max_sim
 
-    return False, max_sim
+def disable_semantic_batching():
+    """Stop the micro-batcher; semantic_match encodes per call again"""
+    global _SEMANTIC_BATCHER
+    batcher, _SEMANTIC_BATCHER = _SEMANTIC_BATCHER, None
+    if batcher is not None:
+        batcher.close()
 
 
 
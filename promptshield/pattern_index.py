@@ -0,0 +1,1222 @@
+"""
+Compiled Pattern Indexes
+
+Load-time structures used by PatternManager so the request path does not
+loop over every pattern:
+- AhoCorasick: multi-string automaton for exact substring signatures
+- RegexBank: precompiled regexes merged into alternation chunks, with
+  ReDoS screening (regex_risks) and per-regex time budgets
+- TokenIndex: inverted token index for fuzzy prompt-overlap scoring
+- PatternRecord: per-pattern fields normalized once for the scoring path
+- TokenMatrix: CSR token-by-pattern matrix for scoring whole batches
+- MinHashLSH: optional sublinear candidate generator for huge prompt corpora
+- LayeredSearch: base index + small delta index for incremental reloads
+- PatternSnapshot: immutable bundle of the above, swapped on reload
+"""
+
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+from typing import (
+    Callable, Dict, FrozenSet, Hashable, Iterable, List, Mapping, NamedTuple,
+    Optional, Sequence, Set, Tuple,
+)
+
+from .pattern_profile import pattern_strategy
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed set of needles.
+
+    Every needle carries an arbitrary hashable payload. A single pass over
+    the input reports the payloads of all needles that occur in it, so the
+    cost is O(len(text) + distinct matches) regardless of needle count.
+
+    Needles longer than `max_depth` are indexed by their first `max_depth`
+    characters and confirmed with a substring test when that anchor occurs.
+    This bounds the trie size for long attack prompts while keeping results
+    exact.
+
+    Usage:
+        automaton = AhoCorasick()
+        automaton.add("ignore previous", "IO-001")
+        automaton.build()
+        automaton.search("please ignore previous rules")  # {"IO-001"}
+    """
+
+    def __init__(self, max_depth: int = 16):
+        self.max_depth = max_depth
+        self._goto: List[Dict[str, int]] = [{}]  # node -> {char: node}
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]  # entries ending at node
+        self._dict_link: List[int] = [0]  # nearest suffix node with output
+        self._entries: List[Tuple[Hashable, Optional[str]]] = []
+        self._built = False
+
+    def add(self, needle: str, payload: Hashable):
+        """Add a needle (matched as-is, callers normalize case)"""
+        goto = self._goto
+        node = 0
+        for ch in needle[:self.max_depth]:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._dict_link.append(0)
+            node = nxt
+
+        verify = needle if len(needle) > self.max_depth else None
+        self._output[node].append(len(self._entries))
+        self._entries.append((payload, verify))
+        self._built = False
+
+    def add_all(self, needles: Iterable):
+        """Add (needle, payload) pairs"""
+        for needle, payload in needles:
+            self.add(needle, payload)
+
+    def build(self) -> "AhoCorasick":
+        """Compute failure and dictionary-suffix links (BFS over the trie)"""
+        goto = self._goto
+        fail_links = self._fail
+        output = self._output
+        dict_link = self._dict_link
+
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+
+                fail = fail_links[node]
+                while fail and ch not in goto[fail]:
+                    fail = fail_links[fail]
+                target = goto[fail].get(ch, 0) if node else 0
+                fail_links[child] = target
+
+                dict_link[child] = (
+                    target if output[target] else dict_link[target]
+                )
+
+        self._built = True
+        return self
+
+    def search(self, text: str) -> Set[Hashable]:
+        """
+        Return payloads of every needle occurring in text.
+
+        Empty needles (stored on the root) always match.
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        dict_link = self._dict_link
+
+        matched = list(output[0])
+        visited = set()
+        node = 0
+
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            # A visited node has already emitted its whole suffix chain
+            hit = node
+            while hit and hit not in visited:
+                visited.add(hit)
+                if output[hit]:
+                    matched.extend(output[hit])
+                hit = dict_link[hit]
+
+        found = set()
+        entries = self._entries
+        for entry in matched:
+            payload, verify = entries[entry]
+            if verify is None or verify in text:
+                found.add(payload)
+
+        return found
+
+    def export(self) -> Tuple[List, List, List, List, List]:
+        """
+        Built automaton as plain lists, for serialization:
+        (goto, fail, dict_link, output, entries[(payload, verify)])
+        """
+        if not self._built:
+            self.build()
+        return self._goto, self._fail, self._dict_link, self._output, self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Constructs that change meaning (or fail to compile) once a regex is
+# embedded in a larger alternation: group references shift, names collide,
+# global inline flags must lead the whole expression.
+_UNMERGEABLE = re.compile(
+    r"\\[1-9]"            # numbered backreference
+    r"|\(\?P[<=]"         # named group / named backreference
+    r"|\(\?<[A-Za-z_]"    # named group (3.12+ syntax)
+    r"|\(\?\("            # conditional on a group
+    r"|\(\?[aiLmsux]+\)"  # global inline flags
+)
+
+
+# ReDoS screening
+#
+# Backtracking blows up when the engine can split the same input between
+# several quantifiers in many ways. The classic shapes are found on the
+# parsed regex:
+# - "exponential": an unbounded repeat around a variable-length repeat that
+#   the rest of the body cannot disambiguate ((a+)+, (\w+\s?)*), or around
+#   alternatives that can match the same text ((a|a)*, (\d+|\d+\.\d+)*)
+# - "polynomial": adjacent unbounded repeats over overlapping characters
+#   (\s*\s*, .*.*=)
+# Possessive repeats and atomic groups never backtrack and are skipped.
+
+_LARGE_REPEAT = 10  # {m,n} with n at least this behaves like *
+
+# Characters used to test whether two character sets overlap
+_SAMPLE_CHARS = "".join(map(chr, range(128))) + "\u00a0\u00e9\u00df\u0416\u200b\u4e2d"
+
+_CATEGORY_TESTS = {
+    "CATEGORY_DIGIT": str.isdigit,
+    "CATEGORY_NOT_DIGIT": lambda ch: not ch.isdigit(),
+    "CATEGORY_SPACE": str.isspace,
+    "CATEGORY_NOT_SPACE": lambda ch: not ch.isspace(),
+    "CATEGORY_WORD": lambda ch: ch.isalnum() or ch == "_",
+    "CATEGORY_NOT_WORD": lambda ch: not (ch.isalnum() or ch == "_"),
+    "CATEGORY_LINEBREAK": lambda ch: ch == "\n",
+    "CATEGORY_NOT_LINEBREAK": lambda ch: ch != "\n",
+}
+
+_REPEATS = {
+    name for name in ("MAX_REPEAT", "MIN_REPEAT") if hasattr(_sre_parse, name)
+}
+
+
+def _op(op) -> str:
+    return str(op)
+
+
+def _char_set(item) -> Optional[FrozenSet[str]]:
+    """Sample characters one parsed item can match, None if not single-char"""
+    op, av = item
+    name = _op(op)
+    if name == "LITERAL":
+        ch = chr(av)
+        return frozenset({ch, ch.lower(), ch.upper()})
+    if name == "NOT_LITERAL":
+        ch = chr(av).lower()
+        return frozenset(c for c in _SAMPLE_CHARS if c.lower() != ch)
+    if name == "ANY":
+        return frozenset(_SAMPLE_CHARS)
+    if name == "IN":
+        negate = False
+        tests = []
+        for sub_op, sub_av in av:
+            sub = _op(sub_op)
+            if sub == "NEGATE":
+                negate = True
+            elif sub == "LITERAL":
+                tests.append(lambda ch, c=chr(sub_av).lower(): ch.lower() == c)
+            elif sub == "RANGE":
+                lo, hi = sub_av
+                tests.append(lambda ch, lo=lo, hi=hi: any(
+                    len(c) == 1 and lo <= ord(c) <= hi
+                    for c in (ch, ch.lower(), ch.upper())
+                ))
+            elif sub == "CATEGORY":
+                tests.append(_CATEGORY_TESTS.get(_op(sub_av), lambda ch: True))
+            else:
+                tests.append(lambda ch: True)
+        return frozenset(
+            ch for ch in _SAMPLE_CHARS if any(t(ch) for t in tests) != negate
+        )
+    if name == "SUBPATTERN" and len(av[-1]) == 1:
+        return _char_set(av[-1][0])
+    return None
+
+
+def _first_chars(items) -> Optional[FrozenSet[str]]:
+    """Characters a sequence can start with (None = unknown/any)"""
+    for item in items:
+        name = _op(item[0])
+        if name in ("AT", "ASSERT", "ASSERT_NOT"):
+            continue  # zero-width
+        chars = _char_set(item)
+        if chars is not None:
+            return chars
+        if name in _REPEATS:
+            lo, _, body = item[1]
+            first = _first_chars(body)
+            return first if lo > 0 else None
+        if name == "SUBPATTERN":
+            return _first_chars(item[1][-1])
+        return None
+    return None
+
+
+def _can_be_empty(item) -> bool:
+    op, av = item
+    name = _op(op)
+    if name in ("AT", "ASSERT", "ASSERT_NOT"):
+        return True
+    if name in _REPEATS or name == "POSSESSIVE_REPEAT":
+        return av[0] == 0 or all(_can_be_empty(sub) for sub in av[2])
+    if name == "SUBPATTERN":
+        return all(_can_be_empty(sub) for sub in av[-1])
+    if name == "BRANCH":
+        return any(all(_can_be_empty(sub) for sub in branch) for branch in av[1])
+    return False
+
+
+def _flatten(items) -> list:
+    """Inline plain groups so a group's items join the surrounding sequence"""
+    flat = []
+    for item in items:
+        if _op(item[0]) == "SUBPATTERN":
+            flat.extend(_flatten(item[1][-1]))
+        else:
+            flat.append(item)
+    return flat
+
+
+def _unbounded(item) -> bool:
+    if _op(item[0]) not in _REPEATS:
+        return False
+    return item[1][1] >= _LARGE_REPEAT  # MAXREPEAT included
+
+
+def _overlap(a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]) -> bool:
+    return a is None or b is None or bool(a & b)
+
+
+def _ambiguous_body(body) -> Optional[str]:
+    """Why repeating `body` many times can backtrack exponentially"""
+    items = _flatten(body)
+    for index, item in enumerate(items):
+        name = _op(item[0])
+        if name in _REPEATS and item[1][1] > item[1][0]:
+            inner = _first_chars(item[1][2])
+            others = items[:index] + items[index + 1:]
+            if all(_can_be_empty(o) or _overlap(inner, _first_chars([o]))
+                   for o in others):
+                return "nested quantifier"
+        if name == "BRANCH":
+            branches = item[1][1]
+            if sum(all(_can_be_empty(sub) for sub in b) for b in branches) > 1:
+                return "quantified alternation with duplicate empty branches"
+            firsts = [_first_chars(b) for b in branches if b]
+            for i in range(len(firsts)):
+                for j in range(i + 1, len(firsts)):
+                    if _overlap(firsts[i], firsts[j]):
+                        return "quantified alternation with overlapping branches"
+    return None
+
+
+def _scan_risks(items, risks: List[Tuple[str, str]]):
+    previous = None
+    for item in _flatten(items):
+        op, av = item
+        name = _op(op)
+
+        if name in _REPEATS:
+            lo, hi, body = av
+            if _unbounded(item):
+                reason = _ambiguous_body(body)
+                if reason:
+                    risks.append(("exponential", reason))
+                if previous is not None and _overlap(
+                        _first_chars(body), _first_chars(previous[1][2])):
+                    risks.append(("polynomial", "adjacent overlapping quantifiers"))
+                previous = item
+            else:
+                previous = None
+            _scan_risks(body, risks)
+            continue
+
+        if not _can_be_empty(item):
+            previous = None
+        if name == "BRANCH":
+            for branch in av[1]:
+                _scan_risks(branch, risks)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            _scan_risks(av[1], risks)
+        elif name == "GROUPREF_EXISTS":
+            _scan_risks(av[1], risks)
+            if av[2]:
+                _scan_risks(av[2], risks)
+        # POSSESSIVE_REPEAT / ATOMIC_GROUP never backtrack
+
+
+@lru_cache(maxsize=4096)
+def regex_risks(source: str, flags: int = re.IGNORECASE) -> Tuple[Tuple[str, str], ...]:
+    """
+    Static ReDoS screening of one regex.
+
+    Returns:
+        ((severity, reason), ...) with severity "exponential" (can stall
+        a worker on short inputs) or "polynomial" (slow on long inputs);
+        empty if no known dangerous construct was found
+    """
+    try:
+        parsed = _sre_parse.parse(source, flags)
+    except (re.error, TypeError, RecursionError):
+        return ()
+    risks: List[Tuple[str, str]] = []
+    _scan_risks(list(parsed), risks)
+    return tuple(dict.fromkeys(risks))
+
+
+def _has_end_assertion(items) -> bool:
+    for op, av in items:
+        if _op(op) == "AT" and ("END" in str(av) or "BOUNDARY" in str(av)):
+            return True
+        for sub in av if isinstance(av, (tuple, list)) else ():
+            if hasattr(sub, "data") and _has_end_assertion(sub.data):
+                return True
+            if isinstance(sub, list) and any(
+                hasattr(branch, "data") and _has_end_assertion(branch.data)
+                for branch in sub
+            ):
+                return True
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _cut_sensitive(source: str, flags: int = re.IGNORECASE) -> bool:
+    """True if a match ending at endpos may be an artifact ($, \\Z, \\b, \\B)"""
+    try:
+        return _has_end_assertion(list(_sre_parse.parse(source, flags)))
+    except (re.error, TypeError, RecursionError):
+        return True
+
+
+class RegexBank:
+    r"""
+    Regexes compiled once at load time.
+
+    Mergeable regexes are packed into alternation "mega-patterns" with one
+    named group per source regex, so a text that matches none of them costs
+    one scan per chunk. Regexes that cannot be merged safely are kept
+    standalone. Invalid regexes are rejected at build time and reported in
+    `errors` instead of failing on the request path.
+
+    ReDoS protection: regexes with an exponential-backtracking construct
+    (see regex_risks) are quarantined at add time and never run;
+    polynomial ones are listed in `flagged` and always run standalone.
+    Chunks scan the whole input. Standalone regexes scan at most the first
+    `max_scan` characters, flagged ones the first `flagged_scan` (their
+    cost can grow with the cube of the length), which bounds the worst
+    case of one long input: `^` and lookbehinds keep their meaning, but a
+    longer input is seen as if it ended at the cut, and matches ending
+    exactly there are dropped for regexes using `$`, `\Z`, `\b` or `\B`.
+    Every scan is timed against
+    `budget_ms` per `window` characters scanned. Python's re cannot be
+    interrupted, so a chunk that overruns is split into standalone
+    regexes, and a standalone regex that overruns `quarantine_after` times
+    in a row is quarantined for `quarantine_ttl` seconds: searches skip it
+    until it expires.
+
+    Usage:
+        bank = RegexBank()
+        bank.add("IO-001", r"ignore\s+previous")
+        bank.build()
+        bank.search("Ignore   previous rules")  # {"IO-001"}
+    """
+
+    def __init__(
+        self,
+        flags: int = re.IGNORECASE,
+        chunk_size: int = 64,
+        budget_ms: Optional[float] = 25.0,
+        window: int = 2048,
+        quarantine_after: int = 3,
+        quarantine_ttl: Optional[float] = 600.0,
+        max_scan: int = 8192,
+        flagged_scan: int = 512
+    ):
+        self.flags = flags
+        self.chunk_size = chunk_size
+        self.budget_ms = budget_ms
+        self.window = window
+        self.max_scan = max_scan
+        self.flagged_scan = flagged_scan
+        self.quarantine_after = quarantine_after
+        self.quarantine_ttl = quarantine_ttl
+        self.errors: Dict[Hashable, str] = {}
+        self.flagged: Dict[Hashable, str] = {}
+        self.quarantined: Dict[Hashable, Dict] = {}
+        self._strikes: Dict[Hashable, int] = {}
+        self._sources: List[Tuple[Hashable, str, re.Pattern]] = []
+        self._chunks: List[Tuple[re.Pattern, Dict[str, Hashable], List]] = []
+        self._standalone: List[Tuple[Hashable, re.Pattern]] = []
+        self._cut_sensitive: Set[Hashable] = set()
+        self._quarantine_lock = threading.Lock()
+
+    @staticmethod
+    def compile(source, flags: int = re.IGNORECASE) -> re.Pattern:
+        """Compile a single regex, raising re.error on invalid input"""
+        if not isinstance(source, str):
+            raise re.error(f"regex must be a string, got {type(source).__name__}")
+        return re.compile(source, flags)
+
+    def add(self, key: Hashable, source: str) -> bool:
+        """
+        Compile and register a regex.
+
+        Returns:
+            False if the regex is invalid (recorded in `errors`)
+        """
+        try:
+            compiled = self.compile(source, self.flags)
+        except re.error as e:
+            self.errors[key] = str(e)
+            return False
+
+        risks = regex_risks(source, self.flags)
+        for severity, reason in risks:
+            if severity == "exponential":
+                self.quarantined[key] = {
+                    "reason": f"static: {reason}", "elapsed_ms": None,
+                    "at": time.time(), "expires_at": None,
+                }
+                return False
+        if risks:
+            self.flagged[key] = "; ".join(reason for _, reason in risks)
+        if _cut_sensitive(source, self.flags):
+            self._cut_sensitive.add(key)
+
+        self._sources.append((key, source, compiled))
+        return True
+
+    def build(self) -> "RegexBank":
+        """Group mergeable regexes into alternation chunks"""
+        self._chunks = []
+        self._standalone = []
+
+        mergeable = []
+        for key, source, compiled in self._sources:
+            if key in self.flagged or _UNMERGEABLE.search(source):
+                self._standalone.append((key, compiled))
+            else:
+                mergeable.append((key, source, compiled))
+
+        for start in range(0, len(mergeable), self.chunk_size):
+            chunk = mergeable[start:start + self.chunk_size]
+            groups = {}
+            parts = []
+            for offset, (key, source, _) in enumerate(chunk):
+                name = f"_r{start + offset}"
+                groups[name] = key
+                parts.append(f"(?P<{name}>(?:{source}))")
+
+            try:
+                combined = re.compile("|".join(parts), self.flags)
+            except re.error:
+                # Chunk does not compile as a whole; keep members standalone
+                self._standalone.extend((key, rx) for key, _, rx in chunk)
+                continue
+
+            members = [(key, rx) for key, _, rx in chunk]
+            self._chunks.append((combined, groups, members))
+
+        return self
+
+    def sources(self) -> List[Tuple[Hashable, str]]:
+        """(key, source) of every valid regex, in insertion order"""
+        return [(key, source) for key, source, _ in self._sources]
+    
+    def search(self, text: str) -> Set[Hashable]:
+        """Return keys of every regex that matches somewhere in text"""
+        hits = set()
+        budget = self._budget(len(text))
+        quarantined = self.quarantined
+        clock = time.perf_counter
+
+        for chunk in self._chunks:
+            combined, groups, members = chunk
+            start = clock()
+            m = combined.search(text)
+            if budget is not None and clock() - start > budget:
+                self._split_chunk(chunk)
+            if m is None:
+                continue
+
+            # The outermost named group that closed identifies the winner;
+            # other members may also match, so confirm them individually.
+            first = groups.get(m.lastgroup) if m.lastgroup else None
+            if first is not None:
+                hits.add(first)
+            for key, rx in members:
+                if key != first and rx.search(text):
+                    hits.add(key)
+
+        # Bounded scans: (cut-off point, budget for that many chars)
+        size = len(text)
+        bounds = {
+            limit: (min(size, limit), self._budget(min(size, limit)))
+            for limit in (self.max_scan, self.flagged_scan)
+        }
+        flagged = self.flagged
+
+        for key, rx in self._standalone:
+            if key in quarantined and self._is_quarantined(key):
+                continue
+            end, budget = bounds[self.flagged_scan if key in flagged else self.max_scan]
+            start = clock()
+            m = rx.search(text, 0, end)
+            if m is not None and (
+                    m.end() < end or end == size or key not in self._cut_sensitive):
+                hits.add(key)
+            elapsed = clock() - start
+            if budget is not None and elapsed > budget:
+                self._overrun(key, elapsed)
+            elif key in self._strikes:
+                self._strikes.pop(key, None)
+
+        return hits
+
+    def _budget(self, length: int) -> Optional[float]:
+        """Seconds one scan of length chars may take: budget_ms per `window` chars"""
+        if not self.budget_ms:
+            return None
+        return self.budget_ms / 1000 * max(1.0, length / self.window)
+
+    def profile(self, text: str) -> List[Tuple[Hashable, float]]:
+        """
+        Time every live regex on its own over text. Costs a full
+        standalone pass, so only for sampled calls.
+        """
+        clock = time.perf_counter
+        bounded = {key for key, _ in self._standalone}
+        costs = []
+        for key, _, rx in self._sources:
+            if key in self.quarantined and self._is_quarantined(key):
+                continue
+            if key in self.flagged:
+                end = self.flagged_scan
+            else:
+                end = self.max_scan if key in bounded else len(text)
+            start = clock()
+            rx.search(text, 0, end)
+            costs.append((key, clock() - start))
+        return costs
+
+    def quarantine_snapshot(self) -> Dict[Hashable, Dict]:
+        """Copy of the quarantine table, safe to iterate while searches run"""
+        with self._quarantine_lock:
+            return {key: dict(info) for key, info in self.quarantined.items()}
+
+    def _split_chunk(self, chunk):
+        """Run an overrunning chunk's members standalone to find the culprit"""
+        with self._quarantine_lock:
+            if chunk not in self._chunks:
+                return
+            # Readers iterate the old lists; publish new ones
+            self._chunks = [c for c in self._chunks if c is not chunk]
+            self._standalone = self._standalone + list(chunk[2])
+
+    def _is_quarantined(self, key: Hashable) -> bool:
+        """True while key's quarantine lasts; an expired one is released"""
+        info = self.quarantined.get(key)
+        if info is None:
+            return False
+        expires_at = info.get("expires_at")
+        if expires_at is None or time.time() < expires_at:
+            return True
+        with self._quarantine_lock:
+            if self.quarantined.get(key) is not info:
+                return key in self.quarantined
+            del self.quarantined[key]
+        print(f"✓ Regex {key} released from quarantine")
+        return False
+
+    def _overrun(self, key: Hashable, elapsed: float):
+        """Count an over-budget scan; quarantine after enough in a row"""
+        with self._quarantine_lock:
+            strikes = self._strikes.get(key, 0) + 1
+            if strikes < self.quarantine_after:
+                self._strikes[key] = strikes
+                return
+            self._strikes.pop(key, None)
+            now = time.time()
+            self.quarantined[key] = {
+                "reason": f"exceeded {self.budget_ms}ms budget {strikes} times in a row",
+                "elapsed_ms": elapsed * 1000,
+                "at": now,
+                "expires_at": now + self.quarantine_ttl if self.quarantine_ttl else None,
+            }
+        expiry = f" for {self.quarantine_ttl:g}s" if self.quarantine_ttl else ""
+        print(
+            f"⚠️  Regex {key} quarantined{expiry}: {strikes} scans over the "
+            f"{self.budget_ms}ms budget (last {elapsed * 1000:.1f}ms)"
+        )
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+class PromptTokens(NamedTuple):
+    """Load-time token view of one attack prompt"""
+    word_set: FrozenSet[str]
+    size: int                   # significant words (with repeats), the overlap ratio denominator
+
+
+class PatternRecord:
+    """
+    Match-ready view of one pattern, normalized once at load time.
+    
+    The scoring hot path reads only these slots: which exact fields the
+    pattern has, the token view of its prompt and its lowercased keywords.
+    The raw dict stays in snapshot.patterns for get_pattern() and stats.
+    
+    Usage:
+        record = PatternRecord(pattern, index.entries.get(pattern_id))
+        record.keywords  # ("ignore", "override") or None
+    """
+    __slots__ = ("has_pattern", "has_regex", "tokens", "keywords", "strategy")
+    
+    def __init__(self, pattern: Mapping, tokens: Optional[PromptTokens] = None):
+        self.has_pattern = 'pattern' in pattern
+        self.has_regex = 'regex' in pattern
+        self.tokens = tokens    # None if the pattern has no prompt
+        self.keywords: Optional[Tuple[str, ...]] = None
+        if 'keywords' in pattern:
+            keywords = pattern['keywords']
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            self.keywords = tuple(
+                sys.intern(kw.lower()) for kw in keywords if isinstance(kw, str)
+            )
+        self.strategy = pattern_strategy(pattern)
+
+
+class TokenIndex:
+    """
+    Inverted index from token to the prompts containing it.
+    
+    Only prompts sharing at least one significant token with the input can
+    score on word overlap, so the cost of `overlaps()` depends on how many
+    postings the input's tokens touch, not on the number of prompts.
+    Single-word prompts score on zero overlap as well and are returned by
+    `always` so callers can still evaluate them.
+    
+    Usage:
+        index = TokenIndex()
+        index.add("IO-001", "ignore all previous instructions")
+        words = index.tokenize("please ignore the instructions")
+        index.overlaps(words)  # {"IO-001": {"ignore", "instructions"}}
+    """
+    
+    def __init__(self, min_word_len: int = 3):
+        self.min_word_len = min_word_len
+        self.entries: Dict[Hashable, PromptTokens] = {}
+        self.postings: Dict[str, List[Hashable]] = {}
+        self.always: List[Hashable] = []
+    
+    def tokenize(self, text_lower: str) -> Set[str]:
+        """Significant words of already-lowercased text"""
+        min_len = self.min_word_len
+        return {w for w in text_lower.split() if len(w) >= min_len}
+    
+    def analyze(self, prompt_lower: str) -> PromptTokens:
+        """Precompute the token view of one lowercased prompt"""
+        min_len = self.min_word_len
+        words = [w for w in prompt_lower.split() if len(w) >= min_len]
+        return PromptTokens(frozenset(map(sys.intern, words)), len(words))
+    
+    def phrases(self, prompt_lower: str) -> Tuple[str, ...]:
+        """3-word sequences of a prompt's significant words (4+ words only)"""
+        min_len = self.min_word_len
+        words = [w for w in prompt_lower.split() if len(w) >= min_len]
+        if len(words) < 4:
+            return ()
+        return tuple(" ".join(words[i:i + 3]) for i in range(len(words) - 2))
+    
+    def add(self, key: Hashable, prompt_lower: str) -> PromptTokens:
+        """Index one prompt and return its token view"""
+        entry = self.analyze(prompt_lower)
+        self.entries[key] = entry
+        
+        for word in entry.word_set:
+            self.postings.setdefault(word, []).append(key)
+        if entry.size == 1:
+            self.always.append(key)
+        
+        return entry
+    
+    def patched(
+        self,
+        removed: Iterable[Hashable],
+        added: Mapping[Hashable, str]
+    ) -> "TokenIndex":
+        """
+        Copy-on-write update: return a new index without `removed` keys and
+        with `added` {key: prompt_lower} indexed. Posting lists untouched by
+        the change are shared with this index, never mutated.
+        """
+        index = TokenIndex(self.min_word_len)
+        index.entries = dict(self.entries)
+        index.postings = dict(self.postings)
+        
+        dropped = set()
+        touched: Dict[str, List[Hashable]] = {}
+        for key in removed:
+            entry = index.entries.pop(key, None)
+            if entry is None:
+                continue
+            dropped.add(key)
+            for word in entry.word_set:
+                if word not in touched:
+                    touched[word] = list(index.postings.get(word, ()))
+        
+        for word, keys in touched.items():
+            touched[word] = [key for key in keys if key not in dropped]
+        
+        for key, prompt_lower in added.items():
+            entry = index.analyze(prompt_lower)
+            index.entries[key] = entry
+            for word in entry.word_set:
+                if word not in touched:
+                    touched[word] = list(index.postings.get(word, ()))
+                touched[word].append(key)
+        
+        for word, keys in touched.items():
+            if keys:
+                index.postings[word] = keys
+            else:
+                index.postings.pop(word, None)
+        
+        index.always = [key for key in self.always if key not in dropped]
+        index.always.extend(
+            key for key in added if index.entries[key].size == 1
+        )
+        return index
+    
+    def overlaps(self, text_words: Iterable[str]) -> Dict[Hashable, Set[str]]:
+        """Map each candidate prompt to the tokens it shares with the input"""
+        common: Dict[Hashable, Set[str]] = {}
+        postings = self.postings
+        
+        for word in text_words:
+            keys = postings.get(word)
+            if keys is None:
+                continue
+            for key in keys:
+                shared = common.get(key)
+                if shared is None:
+                    common[key] = {word}
+                else:
+                    shared.add(word)
+        
+        return common
+    
+    def vocabulary(self) -> List[str]:
+        """Indexed words, in to_matrix() row order"""
+        return list(self.postings)
+    
+    def to_matrix(
+        self,
+        order: Mapping[Hashable, int],
+        critical: Iterable[str] = ()
+    ) -> "TokenMatrix":
+        """Freeze the postings into a TokenMatrix with columns from `order`"""
+        words = {}
+        indptr = [0]
+        indices = []
+        for word, keys in self.postings.items():
+            words[word] = len(words)
+            indices.extend(order[key] for key in keys)
+            indptr.append(len(indices))
+        
+        keys = [None] * len(order)
+        for key, column in order.items():
+            keys[column] = key
+        sizes = np.zeros(len(order), dtype=np.int64)
+        for key, entry in self.entries.items():
+            sizes[order[key]] = entry.size
+        
+        return TokenMatrix(
+            words.get, keys.__getitem__, np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int64), sizes, critical
+        )
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class TokenMatrix:
+    """
+    Token-by-pattern incidence matrix in CSR form (row = vocabulary word,
+    column = pattern load position), for scoring a batch of inputs at once.
+    
+    The batch's token sets form a sparse text-by-token matrix; multiplying
+    it by this one gives, for every (text, prompt) pair that shares a
+    token, the overlap count that TokenIndex.overlaps() would produce as
+    len(common words). A second product over just the `critical` rows
+    counts shared critical words.
+    
+    Usage:
+        matrix = index.to_matrix(snapshot.order)
+        texts, columns, counts, critical = matrix.overlap_counts(word_sets)
+    """
+    
+    def __init__(
+        self,
+        row_of: Callable[[str], Optional[int]],
+        key_of: Callable[[int], Hashable],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        sizes: np.ndarray,
+        critical: Iterable[str] = ()
+    ):
+        self.row_of = row_of        # word -> row, or None
+        self.key_of = key_of        # column -> pattern key
+        self.indptr = indptr
+        self.indices = indices
+        self.sizes = sizes          # prompt word count per column (0 = none)
+        self.n_columns = len(sizes)
+        
+        self.critical_rows = np.zeros(len(indptr) - 1, dtype=np.int64)
+        for word in critical:
+            row = row_of(word)
+            if row is not None:
+                self.critical_rows[row] = 1
+    
+    def overlap_counts(
+        self,
+        word_sets: Iterable[Iterable[str]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sparse overlap of each token set with every prompt.
+        
+        Returns:
+            (text, column, count, critical_count) arrays, one entry per
+            pair with count > 0, sorted by text then column
+        """
+        row_of = self.row_of
+        texts = []
+        rows = []
+        for position, words in enumerate(word_sets):
+            for word in words:
+                row = row_of(word)
+                if row is not None:
+                    texts.append(position)
+                    rows.append(row)
+        
+        empty = np.zeros(0, dtype=np.int64)
+        if not rows:
+            return empty, empty, empty, empty
+        
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return empty, empty, empty, empty
+        
+        # Expand every (text, row) into the row's postings
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        columns = self.indices[offsets + np.arange(total, dtype=np.int64)]
+        pair_text = np.repeat(np.asarray(texts, dtype=np.int64), lengths)
+        pair_critical = np.repeat(self.critical_rows[rows], lengths)
+        
+        # Sum duplicates: one entry per (text, column)
+        pairs, inverse, counts = np.unique(
+            pair_text * self.n_columns + columns,
+            return_inverse=True, return_counts=True
+        )
+        critical = np.bincount(
+            inverse.ravel(), weights=pair_critical, minlength=len(pairs)
+        ).astype(np.int64)
+        
+        return pairs // self.n_columns, pairs % self.n_columns, counts, critical
+
+
+class MinHashLSH:
+    """
+    MinHash signatures of prompt word sets, banded into LSH buckets.
+    
+    Alternative candidate generator to TokenIndex.overlaps() for very
+    large prompt corpora, where common words make posting lists long.
+    Each prompt of `min_size`+ words gets a `num_perm`-value MinHash
+    signature, split into `bands` bands; prompts sharing a band with the
+    input are candidates, then confirmed with the exact shared-word set.
+    Lookup cost depends on the input length, not on posting list sizes.
+    
+    Prompts are usually much shorter than the input, so the input is
+    signed in sliding windows of each `windows` size: a prompt contained
+    in (or paraphrased by) a window has a high Jaccard similarity with it.
+    Recall is approximate, tuned so pairs with Jaccard >= ~0.6 are found
+    with high probability. Shorter prompts, which score on one or two
+    shared words, keep exact postings.
+    
+    Usage:
+        lsh = MinHashLSH.from_index(token_index, snapshot.order)
+        lsh.overlaps(words)  # same shape as TokenIndex.overlaps()
+    """
+    
+    _PRIME = (1 << 31) - 1
+    
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        min_size: int = 4,
+        windows: Tuple[int, ...] = (8, 16, 32),
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.min_size = min_size
+        self.windows = windows
+        
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self._PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self._PRIME, num_perm, dtype=np.uint64)
+        # Odd multipliers fold a band's rows into one 64-bit bucket key
+        self._mix = rng.integers(0, 1 << 63, num_perm // bands, dtype=np.uint64) * 2 + 1
+        
+        self.entries: Mapping[Hashable, PromptTokens] = {}
+        self.key_of: Callable[[int], Hashable] = None
+        self.short: Dict[str, List[Hashable]] = {}  # postings of short prompts
+        self._bucket_keys = np.zeros((bands, 0), dtype=np.uint64)  # sorted per band
+        self._bucket_columns = np.zeros((bands, 0), dtype=np.int64)
+    
+    @classmethod
+    def from_index(
+        cls,
+        index: "TokenIndex",
+        order: Mapping[Hashable, int],
+        **options
+    ) -> "MinHashLSH":
+        """Sign every prompt of a TokenIndex (works on packed indexes too)"""
+        lsh = cls(**options)
+        matrix = index.to_matrix(order)
+        lsh.entries = index.entries
+        lsh.key_of = matrix.key_of
+        
+        vocabulary = index.vocabulary()
+        rows = np.repeat(
+            np.arange(len(vocabulary), dtype=np.int64), np.diff(matrix.indptr)
+        )
+        columns = matrix.indices
+        long_prompt = matrix.sizes >= lsh.min_size
+        
+        # Short prompts: plain postings
+        short = ~long_prompt[columns]
+        for row, column in zip(rows[short].tolist(), columns[short].tolist()):
+            lsh.short.setdefault(vocabulary[row], []).append(lsh.key_of(column))
+        
+        # Long prompts: signature = per-column minimum over their words
+        keep = ~short
+        rows, columns = rows[keep], columns[keep]
+        by_column = np.argsort(columns, kind="stable")
+        rows, columns = rows[by_column], columns[by_column]
+        if not len(columns):
+            return lsh
+        
+        word_hashes = lsh._word_hashes(vocabulary)
+        starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+        signatures = np.empty((len(starts), lsh.num_perm), dtype=np.uint64)
+        block = 4096  # columns per reduceat, bounds the temporary array
+        for i in range(0, len(starts), block):
+            lo = starts[i]
+            hi = starts[i + block] if i + block < len(starts) else len(rows)
+            signatures[i:i + block] = np.minimum.reduceat(
+                lsh._permute(word_hashes[rows[lo:hi]]),
+                starts[i:i + block] - lo, axis=0
+            )
+        
+        keys = lsh._band_keys(signatures)
+        sorted_by = np.argsort(keys, axis=0, kind="stable")
+        lsh._bucket_keys = np.take_along_axis(keys, sorted_by, axis=0).T.copy()
+        lsh._bucket_columns = columns[starts][sorted_by].T.copy()
+        return lsh
+    
+    def _word_hashes(self, words: Iterable[str]) -> np.ndarray:
+        """Stable 32-bit hash per word (crc32, independent of PYTHONHASHSEED)"""
+        return np.fromiter(
+            (zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64
+        )
+    
+    def _permute(self, hashes: np.ndarray) -> np.ndarray:
+        """(len(hashes), num_perm) universal-hash permutations of word hashes"""
+        return (hashes[:, None] * self._a + self._b) % self._PRIME
+    
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) bucket keys; wraps mod 2**64 by design"""
+        rows = signatures.reshape(len(signatures), self.bands, -1)
+        keys = (rows * self._mix).sum(axis=2, dtype=np.uint64)
+        return keys + np.arange(self.bands, dtype=np.uint64)
+    
+    def candidates(self, words: Sequence[str]) -> Set[Hashable]:
+        """Long prompts sharing at least one band with an input window"""
+        if not words or not self._bucket_keys.shape[1]:
+            return set()
+        
+        vocabulary = list(dict.fromkeys(words))
+        position = {word: i for i, word in enumerate(vocabulary)}
+        positions = np.fromiter(
+            (position[word] for word in words), dtype=np.int64, count=len(words)
+        )
+        values = self._permute(self._word_hashes(vocabulary))
+        
+        # Sliding windows of each size, half-overlapping, tail included
+        starts = []
+        bounds = []
+        for size in self.windows:
+            if size >= len(words):
+                starts.append(0)
+                bounds.append(len(words))
+                break
+            step = max(size // 2, 1)
+            for start in range(0, len(words) - size + step, step):
+                start = min(start, len(words) - size)
+                starts.append(start)
+                bounds.append(start + size)
+        lengths = np.asarray(bounds) - np.asarray(starts)
+        offsets = np.repeat(np.asarray(starts) - (np.cumsum(lengths) - lengths), lengths)
+        window_words = positions[offsets + np.arange(int(lengths.sum()))]
+        signatures = np.minimum.reduceat(
+            values[window_words], np.cumsum(lengths) - lengths, axis=0
+        )
+        keys = self._band_keys(signatures)
+        
+        found = []
+        for band in range(self.bands):
+            bucket_keys = self._bucket_keys[band]
+            query = np.unique(keys[:, band])
+            lo = np.searchsorted(bucket_keys, query, side="left")
+            hi = np.searchsorted(bucket_keys, query, side="right")
+            counts = hi - lo
+            total = int(counts.sum())
+            if total:
+                offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                found.append(self._bucket_columns[band][offsets + np.arange(total)])
+        
+        if not found:
+            return set()
+        key_of = self.key_of
+        return {key_of(column) for column in np.unique(np.concatenate(found)).tolist()}
+    
+    def overlaps(self, words: Sequence[str]) -> Dict[Hashable, Set[str]]:
+        """
+        Map candidate prompts to the words they share with the input.
+        
+        `words` are the input's significant words in order (the windows
+        need the order). Long-prompt candidates are confirmed exactly, so
+        each shared set is the one TokenIndex.overlaps() would return;
+        only prompts the LSH does not propose can be missing.
+        """
+        word_set = set(words)
+        common: Dict[Hashable, Set[str]] = {}
+        short = self.short
+        
+        for word in word_set:
+            for key in short.get(word, ()):
+                shared = common.get(key)
+                if shared is None:
+                    common[key] = {word}
+                else:
+                    shared.add(word)
+        
+        entries = self.entries
+        for key in self.candidates(words):
+            shared = entries[key].word_set & word_set
+            if shared:
+                common[key] = shared
+        
+        return common
+    
+    def __len__(self) -> int:
+        return self._bucket_keys.shape[1]
+
+
+class LayeredSearch:
+    """
+    A large base index plus a small delta index built from changed patterns.
+    
+    Rebuilding an Aho-Corasick automaton or a merged regex bank means
+    recompiling everything, so incremental reloads leave the base untouched,
+    mask out base results for pattern ids that changed or disappeared, and
+    compile only the changed patterns into the delta. The owner compacts
+    (full rebuild) once the delta grows too large.
+    
+    Usage:
+        layered = LayeredSearch(base, delta, masked={"IO-002"},
+                                key=lambda payload: payload[0])
+        layered.search(text)
+    """
+    
+    def __init__(
+        self,
+        base,
+        delta,
+        masked: FrozenSet[Hashable],
+        key: Optional[Callable[[Hashable], Hashable]] = None
+    ):
+        self.base = base
+        self.delta = delta
+        self.masked = masked
+        self.key = key
+    
+    def search(self, text: str) -> Set[Hashable]:
+        found = self.base.search(text)
+        if self.masked and found:
+            key = self.key
+            masked = self.masked
+            found = {
+                payload for payload in found
+                if (key(payload) if key else payload) not in masked
+            }
+        found |= self.delta.search(text)
+        return found
+    
+    def __len__(self) -> int:
+        return len(self.base) + len(self.delta)
+
+
+class PatternSnapshot(NamedTuple):
+    """
+    Immutable, fully compiled view of the pattern DB.
+    
+    PatternManager publishes a new snapshot with a single reference
+    assignment on reload. Readers take whichever snapshot is current
+    without locking or copying, and keep using it for the whole request
+    even if a reload lands meanwhile.
+    """
+    version: str
+    loaded_at: float
+    patterns: Mapping[Hashable, Dict]      # read-only view
+    records: Mapping[Hashable, PatternRecord]  # same keys, match-ready
+    automaton: AhoCorasick                 # pattern/prompt/phrase strings
+    regex_bank: RegexBank                  # (either may be a LayeredSearch)
+    token_index: TokenIndex
+    order: Mapping[Hashable, int]          # load position, breaks score ties
+    always: Tuple[Hashable, ...]           # scored on every request
+    base_patterns: Mapping[Hashable, Dict]  # what the base indexes hold
+    lsh: Optional[MinHashLSH] = None       # fuzzy candidates (opt-in)
@@ -3,18 +3,65 @@ Pattern Hot-Reload Manager
 
 Thread-safe pattern manager with:
 - Zero-downtime pattern updates
+- Compiled multi-pattern matching (Aho-Corasick + merged regexes)
+- Inverted token index for fuzzy prompt overlap (or opt-in MinHash LSH)
+- Lock-free reads of immutable, copy-on-write pattern snapshots
+- Per-thread hit counters, merged lazily for stats
+- Early-exit matching once the block decision is certain
+- Incremental per-file reloads (only changed files are re-parsed)
+- Memory-mapped precompiled pattern packs for fast cold start
+- Batch matching (match_many) with vectorized overlap scoring
+- ReDoS screening and per-regex time budgets with auto-quarantine
+- Opt-in sampled cost profiling per pattern and strategy
 - Pattern versioning
 - Effectiveness tracking
 - A/B testing support
 """
 
+import ctypes
+import ctypes.util
+import hashlib
 import json
 import os
+import re
+import select
+import signal
+import struct
+import sys
 import threading
 import time
 from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import (
+    Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .analyzed_text import AnalyzedText
+from .pattern_index import (
+    AhoCorasick, LayeredSearch, MinHashLSH, PatternRecord, PatternSnapshot,
+    RegexBank, TokenIndex, TokenMatrix, regex_risks,
+)
+from .pattern_pack import PackError, PackedPatterns, load_pack
+from .pattern_profile import PatternProfiler, ProfileRecord
+
+# Shared prompt words that boost a fuzzy overlap score by 0.15
+CRITICAL_KEYWORDS = frozenset({
+    'ignore', 'disregard', 'override', 'jailbreak', 'system', 'prompt',
+    'developer', 'mode',
+})
+
+
+class _PatternFile(NamedTuple):
+    """A parsed pattern file and the fingerprint it was parsed from"""
+    mtime_ns: int
+    size: int
+    digest: str  # SHA-256 of the raw bytes
+    entries: Tuple[Tuple[Optional[str], Dict], ...]  # (explicit id, pattern)
 
 
 class PatternManager:
@@ -32,71 +79,433 @@ class PatternManager:
         manager = PatternManager("promptshield/attack_db")
         matched, score, rule = manager.match(user_input)
         
+        # Stop at the first decisive hit (request path)
+        matched, score, rule = manager.match(user_input, mode="early_exit")
+        
+        # Bulk scans / request bursts
+        results = manager.match_many(texts)
+        
         # Later, hot-reload new patterns
         manager.hot_reload()
+        
+        # Cold start from a precompiled pack (see pattern_pack.compile_pack)
+        manager = PatternManager("promptshield/attack_db", pack_path="attack_db.pspack")
     """
     
-    def __init__(self, patterns_dir: str):
+    MATCH_MODES = ("full", "early_exit")
+    
+    # Candidate generators for prompt-overlap scoring: "token" (exact
+    # inverted index) or "minhash" (MinHashLSH, approximate, sublinear).
+    FUZZY_INDEXES = ("token", "minhash")
+    
+    # Incremental reloads compile changed patterns into a delta layer on top
+    # of the base indexes; past this fraction of the base, rebuild fully.
+    DELTA_COMPACT_RATIO = 0.25
+    
+    def __init__(
+        self,
+        patterns_dir: str,
+        block_threshold: float = 0.5,
+        pack_path: Optional[str] = None,
+        regex_budget_ms: Optional[float] = 25.0,
+        fuzzy_index: str = "token"
+    ):
         """
         Initialize pattern manager.
         
         Args:
             patterns_dir: Directory containing pattern JSON files
+            block_threshold: Score above which match() reports a match
+            pack_path: Precompiled pattern pack to memory-map instead of
+                parsing patterns_dir (falls back to JSON if unusable)
+            regex_budget_ms: Time one regex scan may take per 2048 input
+                characters; a regex over budget several scans in a row is
+                quarantined for a while (None disables runtime quarantine)
+            fuzzy_index: "token" finds every prompt sharing a word with the
+                input; "minhash" proposes near-duplicate prompts through
+                MinHash LSH, for very large harvested prompt corpora
         """
+        if fuzzy_index not in self.FUZZY_INDEXES:
+            raise ValueError(
+                f"Unknown fuzzy index '{fuzzy_index}'. Available: {self.FUZZY_INDEXES}"
+            )
         self.patterns_dir = patterns_dir
-        self.patterns = {}
-        self.version = "1.0.0"
-        self.last_reload = time.time()
-        self.pattern_stats = {}  # Track hits per pattern
-        self._lock = threading.RLock()  # Reentrant lock
+        self.block_threshold = block_threshold
+        self.regex_budget_ms = regex_budget_ms
+        self.fuzzy_index = fuzzy_index
+        self._lock = threading.RLock()  # Serializes stats writers
+        self._reload_lock = threading.RLock()  # Serializes reloads
+        
+        # Per-file fingerprints and parsed entries, for incremental reloads
+        self._file_cache: Dict[str, _PatternFile] = {}
+        self._last_scan: Dict = {}
+        self.last_reload_report: Dict = {}
+        
+        # Hit counts per pattern: each thread bumps its own dict without
+        # locking, get_stats() merges them. Counts of finished threads are
+        # folded into _retired_hits whenever a new thread registers a shard.
+        self._hit_local = threading.local()
+        self._hit_shards = []  # [(thread, {pattern_id: hits}), ...]
+        self._retired_hits = {}
+        
+        # (snapshot, TokenMatrix, always mask) for match_many, built lazily
+        self._batch_index = None
+        
+        # Cost profiling (opt-in, see enable_profiling)
+        self._profiler: Optional[PatternProfiler] = None
         
         # Load initial patterns
-        self.patterns = self._load_patterns()
+        self.pack_path = pack_path
+        self._snapshot = self._load_pack(pack_path) if pack_path else None
+        if self._snapshot is None:
+            self._snapshot = self._compile_snapshot(self._load_patterns(), "1.0.0")
+    
+    @property
+    def snapshot(self) -> PatternSnapshot:
+        """Current compiled snapshot (immutable, safe to hold on to)"""
+        return self._snapshot
+    
+    @property
+    def patterns(self):
+        """Read-only view of the current patterns"""
+        return self._snapshot.patterns
+    
+    @property
+    def pattern_stats(self) -> Dict[str, int]:
+        """Hits per pattern, merged across threads"""
+        return self._merge_hits()
+    
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+    
+    @property
+    def last_reload(self) -> float:
+        return self._snapshot.loaded_at
     
     def _load_patterns(self) -> Dict:
-        """Load all pattern files from directory"""
+        """
+        Load all pattern files from directory.
+        
+        Files whose fingerprint (mtime and size, then SHA-256 of the bytes)
+        is unchanged since the previous load are neither re-read nor
+        re-parsed, and their pattern objects are reused as-is. Compilation
+        relies on that identity to tell which patterns changed. File-level
+        changes are recorded in self._last_scan.
+        """
         patterns = {}
+        start = time.perf_counter()
+        seen: Dict[str, _PatternFile] = {}
+        scan = {"added_files": [], "changed_files": [], "removed_files": []}
         
         if not os.path.exists(self.patterns_dir):
             print(f"⚠️  Pattern directory not found: {self.patterns_dir}")
-            return patterns
+        else:
+            # Recursively find all JSON files
+            for json_file in Path(self.patterns_dir).rglob("*.json"):
+                path = str(json_file)
+                cached = self._file_cache.get(path)
+                parsed = self._read_pattern_file(json_file, cached)
+                if parsed is None:
+                    continue
+                
+                seen[path] = parsed
+                if cached is None:
+                    scan["added_files"].append(path)
+                elif parsed.entries is not cached.entries:
+                    scan["changed_files"].append(path)
+                
+                for explicit_id, pattern in parsed.entries:
+                    pattern_id = explicit_id
+                    if pattern_id is None:
+                        pattern_id = f"{json_file.stem}_{len(patterns)}"
+                    patterns[pattern_id] = pattern
         
-        # Recursively find all JSON files
-        for json_file in Path(self.patterns_dir).rglob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # Support both single pattern and array of patterns
-                    if isinstance(data, list):
-                        for pattern in data:
-                            pattern_id = pattern.get('id', f"{json_file.stem}_{len(patterns)}")
-                            patterns[pattern_id] = pattern
-                    elif isinstance(data, dict):
-                        # Check if it's a pattern collection
-                        if 'patterns' in data:
-                            for pattern in data['patterns']:
-                                pattern_id = pattern.get('id', f"{json_file.stem}_{len(patterns)}")
-                                patterns[pattern_id] = pattern
-                        else:
-                            # Single pattern
-                            pattern_id = data.get('id', json_file.stem)
-                            patterns[pattern_id] = data
-                            
-            except Exception as e:
-                print(f"⚠️  Failed to load {json_file}: {e}")
+        scan["removed_files"] = [p for p in self._file_cache if p not in seen]
+        scan["parse_ms"] = (time.perf_counter() - start) * 1000
+        self._file_cache = seen
+        self._last_scan = scan
         
         print(f"✓ Loaded {len(patterns)} attack patterns")
         return patterns
     
+    def _load_pack(self, pack_path: str) -> Optional[PatternSnapshot]:
+        """Memory-map a precompiled pack, or None to fall back to JSON"""
+        try:
+            snapshot = load_pack(pack_path)
+        except PackError as e:
+            print(f"⚠️  {e} - loading JSON patterns instead")
+            return None
+        
+        snapshot.regex_bank.budget_ms = self.regex_budget_ms
+        snapshot = snapshot._replace(
+            lsh=self._build_lsh(snapshot.token_index, snapshot.order)
+        )
+        print(f"✓ Loaded {len(snapshot.patterns)} attack patterns from pack {pack_path}")
+        return snapshot
+    
+    def _read_pattern_file(
+        self,
+        json_file: Path,
+        cached: Optional[_PatternFile]
+    ) -> Optional[_PatternFile]:
+        """Parse one pattern file, reusing `cached` if it has not changed"""
+        try:
+            stat = json_file.stat()
+            if (cached is not None and cached.mtime_ns == stat.st_mtime_ns
+                    and cached.size == stat.st_size):
+                return cached
+            
+            raw = json_file.read_bytes()
+        except OSError as e:
+            print(f"⚠️  Failed to load {json_file}: {e}")
+            return None
+        
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached.digest == digest:
+            # Touched but identical
+            return cached._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        
+        entries = []
+        try:
+            data = json.loads(raw.decode('utf-8'))
+            
+            # Support both single pattern and array of patterns
+            if isinstance(data, list):
+                for pattern in data:
+                    entries.append((pattern.get('id'), pattern))
+            elif isinstance(data, dict):
+                # Check if it's a pattern collection
+                if 'patterns' in data:
+                    for pattern in data['patterns']:
+                        entries.append((pattern.get('id'), pattern))
+                else:
+                    # Single pattern
+                    entries.append((data.get('id', json_file.stem), data))
+                    
+        except Exception as e:
+            print(f"⚠️  Failed to load {json_file}: {e}")
+        
+        # Keep the previous objects for patterns whose content is unchanged,
+        # so an edit to one pattern recompiles just that pattern
+        if cached is not None:
+            previous = dict(cached.entries)
+            entries = [
+                (pid, previous[pid] if previous.get(pid) == pattern else pattern)
+                for pid, pattern in entries
+            ]
+        
+        return _PatternFile(stat.st_mtime_ns, stat.st_size, digest, tuple(entries))
+    
+    @staticmethod
+    def _diff_patterns(old, new) -> Tuple[Dict, List[str]]:
+        """
+        Patterns of `new` that are not the very same object in `old`
+        (added or changed), and ids of `old` missing from `new`.
+        
+        Patterns decoded from a pack are never shared with JSON loads, so
+        against a pack `old` the comparison is by content.
+        """
+        if isinstance(old, PackedPatterns):
+            changed = {
+                pattern_id: pattern for pattern_id, pattern in new.items()
+                if old.get(pattern_id) != pattern
+            }
+        else:
+            changed = {
+                pattern_id: pattern for pattern_id, pattern in new.items()
+                if old.get(pattern_id) is not pattern
+            }
+        removed = [pattern_id for pattern_id in old if pattern_id not in new]
+        return changed, removed
+    
+    def _compile_snapshot(
+        self,
+        patterns: Dict,
+        version: str,
+        previous: Optional[PatternSnapshot] = None
+    ) -> PatternSnapshot:
+        """
+        Build every load-time structure match() needs into one snapshot.
+        
+        With `previous`, only what changed is compiled: the token index is
+        patched copy-on-write, and the automaton and regex bank get a delta
+        layer over the previous base (masking changed/removed ids) until
+        the delta outgrows DELTA_COMPACT_RATIO of the base.
+        
+        `always` holds patterns scored on every request: keyword patterns,
+        and single-word prompts which score on zero overlap.
+        
+        A snapshot loaded from a pack is read-only and is never patched;
+        the first reload after a pack load rebuilds fully.
+        """
+        if previous is not None and isinstance(previous.patterns, PackedPatterns):
+            previous = None
+        
+        if previous is None:
+            token_index = self._build_token_index(patterns)
+            records = self._build_records(patterns, token_index)
+            automaton = self._build_automaton(patterns, token_index)
+            regex_bank = self._build_regex_bank(patterns)
+            base_patterns = patterns
+        else:
+            changed, removed = self._diff_patterns(previous.patterns, patterns)
+            token_index = previous.token_index.patched(
+                list(changed) + removed,
+                {
+                    pattern_id: pattern['prompt'].lower()
+                    for pattern_id, pattern in changed.items()
+                    if isinstance(pattern.get('prompt'), str)
+                }
+            )
+            records = dict(previous.records)
+            for pattern_id in removed:
+                del records[pattern_id]
+            records.update(self._build_records(changed, token_index))
+            
+            base_patterns = previous.base_patterns
+            dirty, gone = self._diff_patterns(base_patterns, patterns)
+            
+            if len(dirty) + len(gone) > len(base_patterns) * self.DELTA_COMPACT_RATIO:
+                automaton = self._build_automaton(patterns, token_index)
+                regex_bank = self._build_regex_bank(patterns)
+                base_patterns = patterns
+            else:
+                masked = frozenset(
+                    pattern_id for pattern_id in list(dirty) + gone
+                    if pattern_id in base_patterns
+                )
+                automaton = LayeredSearch(
+                    getattr(previous.automaton, 'base', previous.automaton),
+                    self._build_automaton(dirty, token_index),
+                    masked,
+                    key=itemgetter(0)
+                )
+                regex_bank = LayeredSearch(
+                    getattr(previous.regex_bank, 'base', previous.regex_bank),
+                    self._build_regex_bank(dirty),
+                    masked
+                )
+        
+        always = set(token_index.always)
+        view = MappingProxyType(patterns)
+        if base_patterns is patterns:
+            base_patterns = view
+        order = MappingProxyType(
+            {pattern_id: i for i, pattern_id in enumerate(patterns)}
+        )
+        
+        return PatternSnapshot(
+            version=version,
+            loaded_at=time.time(),
+            patterns=view,
+            records=MappingProxyType(records),
+            automaton=automaton,
+            regex_bank=regex_bank,
+            token_index=token_index,
+            order=order,
+            always=tuple(
+                pattern_id for pattern_id, pattern in patterns.items()
+                if 'keywords' in pattern or pattern_id in always
+            ),
+            base_patterns=base_patterns,
+            lsh=self._build_lsh(token_index, order),
+        )
+    
+    def _build_token_index(self, patterns: Dict) -> TokenIndex:
+        """Index the significant words of every `prompt`"""
+        index = TokenIndex(min_word_len=3)  # words of 3+ chars
+        
+        for pattern_id, pattern in patterns.items():
+            prompt = pattern.get('prompt')
+            if isinstance(prompt, str):
+                index.add(pattern_id, prompt.lower())
+        
+        return index
+    
+    def _build_lsh(
+        self,
+        token_index: TokenIndex,
+        order: Mapping
+    ) -> Optional[MinHashLSH]:
+        """
+        MinHash LSH over the prompts if fuzzy_index="minhash", else None.
+        
+        Signatures are computed vectorized from the token postings, so the
+        LSH is simply rebuilt for every snapshot (incremental reloads too).
+        """
+        if self.fuzzy_index != "minhash":
+            return None
+        return MinHashLSH.from_index(token_index, order)
+    
+    def _build_records(self, patterns: Dict, token_index: TokenIndex) -> Dict:
+        """Normalize patterns into match-ready records (tokens are shared)"""
+        entries = token_index.entries
+        return {
+            pattern_id: PatternRecord(pattern, entries.get(pattern_id))
+            for pattern_id, pattern in patterns.items()
+        }
+    
+    def _build_automaton(
+        self,
+        patterns: Dict,
+        token_index: TokenIndex
+    ) -> AhoCorasick:
+        """
+        Compile exact `pattern` and `prompt` strings into one automaton.
+        
+        The 3-word phrases of long prompts are added too. Payloads are
+        (pattern_id, field) so a single scan tells match() which field of
+        which pattern occurs in the input.
+        """
+        automaton = AhoCorasick()
+        
+        for pattern_id, pattern in patterns.items():
+            value = pattern.get('pattern')
+            if isinstance(value, str):
+                automaton.add(value.lower(), (pattern_id, 'pattern'))
+            
+            prompt = pattern.get('prompt')
+            if isinstance(prompt, str):
+                prompt_lower = prompt.lower()
+                automaton.add(prompt_lower, (pattern_id, 'prompt'))
+                for phrase in token_index.phrases(prompt_lower):
+                    automaton.add(phrase, (pattern_id, 'phrase'))
+        
+        return automaton.build()
+    
+    def _build_regex_bank(self, patterns: Dict) -> RegexBank:
+        """
+        Compile every `regex` once; invalid ones are rejected here.
+        
+        A rejected regex never matches (the pattern's other fields still
+        apply) and is reported so the pattern file can be fixed. Regexes
+        that can backtrack exponentially are quarantined the same way
+        rather than failing the whole load; a bad pattern file must not
+        block other updates or stall workers.
+        """
+        bank = RegexBank(flags=re.IGNORECASE, budget_ms=self.regex_budget_ms)
+        
+        for pattern_id, pattern in patterns.items():
+            if 'regex' in pattern:
+                bank.add(pattern_id, pattern['regex'])
+        
+        for pattern_id, error in bank.errors.items():
+            print(f"⚠️  Pattern {pattern_id} has invalid regex, skipping: {error}")
+        for pattern_id, info in bank.quarantined.items():
+            print(f"⚠️  Pattern {pattern_id} regex quarantined ({info['reason']})")
+        for pattern_id, reason in bank.flagged.items():
+            print(f"⚠️  Pattern {pattern_id} regex may be slow on long inputs ({reason})")
+        
+        return bank.build()
+    
     def _validate_patterns(self, patterns: Dict) -> bool:
         """
         Validate pattern structure.
         
         Required fields:
         - id: Unique identifier
-        - pattern or regex: Match pattern
-        - type: Attack type
+        - pattern, regex, keywords or prompt: Match criterion
         """
         required_fields = ['id']
         
@@ -108,9 +517,17 @@ class PatternManager:
                     return False
             
             # Check has at least one match method
-            if not any(k in pattern for k in ['pattern', 'regex', 'keywords']):
+            if not any(k in pattern for k in ['pattern', 'regex', 'keywords', 'prompt']):
                 print(f"⚠️  Pattern {pattern_id} has no match criterion")
                 return False
+            
+            # Reject bad regexes at load time, not on the request path
+            if 'regex' in pattern:
+                try:
+                    RegexBank.compile(pattern['regex'], re.IGNORECASE)
+                except re.error as e:
+                    print(f"⚠️  Pattern {pattern_id} has invalid regex: {e}")
+                    return False
         
         return True
     
@@ -118,30 +535,62 @@ class PatternManager:
         """
         Reload patterns without restart (zero-downtime).
         
+        Only files whose fingerprint changed are re-parsed, only changed
+        patterns are validated and compiled. What changed and how long it
+        took is kept in `last_reload_report` (also in get_stats()).
+        
         Returns:
             True if reload successful, False otherwise
         """
         print("🔄 Hot-reloading patterns...")
         
         try:
-            # Load new patterns
-            new_patterns = self._load_patterns()
-            
-            # Validate
-            if not self._validate_patterns(new_patterns):
-                print("✗ Pattern validation failed - keeping old patterns")
-                return False
-            
-            # Atomic swap with write lock
-            with self._lock:
-                old_count = len(self.patterns)
-                self.patterns = new_patterns
-                self.version = self._increment_version()
-                self.last_reload = time.time()
+            with self._reload_lock:
+                start = time.perf_counter()
+                
+                # Load new patterns (unchanged files come from cache)
+                new_patterns = self._load_patterns()
+                scan = self._last_scan
+                
+                old_snapshot = self._snapshot
+                changed, removed = self._diff_patterns(
+                    old_snapshot.patterns, new_patterns
+                )
+                
+                if not changed and not removed:
+                    self.last_reload_report = self._reload_report(
+                        scan, old_snapshot, old_snapshot, {}, [], start, start
+                    )
+                    print(f"✓ Patterns unchanged (version {self.version})")
+                    return True
+                
+                # Validate
+                if not self._validate_patterns(changed):
+                    print("✗ Pattern validation failed - keeping old patterns")
+                    return False
+                
+                # Readers never take a lock; publishing the new snapshot is
+                # a single reference assignment.
+                rebuild_start = time.perf_counter()
+                new_snapshot = self._compile_snapshot(
+                    new_patterns, self._increment_version(), previous=old_snapshot
+                )
+                self._snapshot = new_snapshot
+                
+                report = self._reload_report(
+                    scan, old_snapshot, new_snapshot, changed, removed,
+                    start, rebuild_start
+                )
+                self.last_reload_report = report
             
-            new_count = len(new_patterns)
-            print(f"✓ Patterns reloaded: {old_count} → {new_count}")
+            print(f"✓ Patterns reloaded: {len(old_snapshot.patterns)} → {len(new_patterns)}")
             print(f"  Version: {self.version}")
+            print(
+                f"  Files +{len(report['added_files'])} ~{len(report['changed_files'])} "
+                f"-{len(report['removed_files'])}, patterns +{report['patterns_added']} "
+                f"~{report['patterns_changed']} -{report['patterns_removed']}, "
+                f"{report['rebuild']} rebuild in {report['rebuild_ms']:.1f}ms"
+            )
             
             return True
             
@@ -149,12 +598,62 @@ class PatternManager:
             print(f"✗ Hot-reload failed: {e}")
             return False
     
-    def match(self, text: str) -> Tuple[bool, float, Optional[str]]:
+    @staticmethod
+    def _reload_report(
+        scan: Dict,
+        old: PatternSnapshot,
+        new: PatternSnapshot,
+        changed: Dict,
+        removed: List[str],
+        start: float,
+        rebuild_start: float
+    ) -> Dict:
+        """Summarize a reload for last_reload_report"""
+        now = time.perf_counter()
+        added = sum(1 for pattern_id in changed if pattern_id not in old.patterns)
+        
+        if new is old:
+            rebuild = "none"
+        elif new.base_patterns is new.patterns:
+            rebuild = "full"
+        else:
+            rebuild = "incremental"
+        
+        return {
+            "version": new.version,
+            "added_files": scan.get("added_files", []),
+            "changed_files": scan.get("changed_files", []),
+            "removed_files": scan.get("removed_files", []),
+            "patterns_added": added,
+            "patterns_changed": len(changed) - added,
+            "patterns_removed": len(removed),
+            "rebuild": rebuild,
+            "parse_ms": scan.get("parse_ms", 0.0),
+            "rebuild_ms": (now - rebuild_start) * 1000,
+            "total_ms": (now - start) * 1000,
+        }
+    
+    def match(
+        self,
+        text: Union[str, AnalyzedText],
+        mode: str = "full",
+        hit_ids: Optional[List[str]] = None
+    ) -> Tuple[bool, float, Optional[str]]:
         """
         Match text against all patterns.
         
         Args:
-            text: Text to check
+            text: Text to check; an AnalyzedText reuses its lowercased and
+                tokenized views (and fills them in for later stages)
+            mode: "full" scores every candidate pattern (exact best match,
+                complete hit stats; use for offline analysis).
+                "early_exit" evaluates cheap, high-confidence signatures
+                first (exact prompt, regex, exact pattern, phrase) and
+                returns at the first score above the block threshold. The
+                decision is the same as "full"; score/rule_id are those of
+                the deciding pattern and hit stats only cover what ran.
+            hit_ids: If given, every pattern ID counted as a hit is
+                appended to it (to replay with record_hits())
         
         Returns:
             Tuple of (matched, score, rule_id)
@@ -162,114 +661,527 @@ class PatternManager:
             - score: Highest match score (0.0-1.0)
             - rule_id: ID of matched rule (or None)
         """
-        with self._lock:
-            patterns_snapshot = self.patterns.copy()
+        if mode not in self.MATCH_MODES:
+            raise ValueError(f"Unknown match mode '{mode}'. Available: {self.MATCH_MODES}")
+        
+        snapshot = self._snapshot  # no lock, no copy
+        early_exit = mode == "early_exit"
+        
+        analyzed = AnalyzedText.of(text)
+        token_index = snapshot.token_index
+        
+        profiler = self._profiler
+        record = profiler.begin() if profiler is not None and profiler.sample() else None
+        
+        hits, scored, best_match, max_score = self._exact_stages(
+            snapshot, analyzed, early_exit, record, hit_ids
+        )
+        if max_score > self.block_threshold:
+            if record is not None:
+                profiler.commit(record)
+            return True, max_score, best_match
+        
+        # Tokenize once; only prompts sharing a word can score on overlap
+        start = time.perf_counter()
+        if snapshot.lsh is None:
+            overlaps = token_index.overlaps(analyzed.word_set(token_index.min_word_len))
+        else:
+            overlaps = snapshot.lsh.overlaps(analyzed.tokens(token_index.min_word_len))
+        if record is not None:
+            record.stage("token_index", time.perf_counter() - start)
         
+        # Every other pattern scores 0.0, so skip it entirely
+        candidates = set(hits)
+        candidates.update(overlaps)
+        candidates.update(snapshot.always)
+        candidates.difference_update(scored)
+        
+        best_match, max_score = self._score_patterns(
+            snapshot, analyzed,
+            sorted(candidates, key=snapshot.order.__getitem__),
+            hits, overlaps, scored, best_match, max_score,
+            stop_above=self.block_threshold if early_exit else None,
+            record=record, hit_ids=hit_ids
+        )
+        
+        matched = max_score > self.block_threshold  # Threshold for blocking
+        
+        if record is not None:
+            profiler.commit(record)
+        
+        return matched, max_score, best_match
+    
+    def match_many(
+        self,
+        texts: Iterable[Union[str, AnalyzedText]],
+        mode: str = "full"
+    ) -> List[Tuple[bool, float, Optional[str]]]:
+        """
+        Match a batch of texts; same per-text results as match().
+        
+        Exact signatures (automaton, regex bank) still run per text. The
+        fuzzy prompt-overlap stage, which dominates on large DBs, runs once
+        for the whole batch: token sets are multiplied with the cached
+        token-by-pattern matrix and overlap scores are computed with NumPy.
+        Patterns with an exact hit, keywords or single-word prompts are
+        scored individually as in match().
+        
+        Args:
+            texts: Texts to check
+            mode: "full" or "early_exit", as for match()
+        
+        Returns:
+            List of (matched, score, rule_id), in input order
+        """
+        if mode not in self.MATCH_MODES:
+            raise ValueError(f"Unknown match mode '{mode}'. Available: {self.MATCH_MODES}")
+        
+        snapshot = self._snapshot  # one snapshot for the whole batch
+        if snapshot.lsh is not None:
+            # LSH candidates are approximate; the batch overlap matrix is
+            # exact and would disagree with match()
+            return [self.match(text, mode) for text in texts]
+        early_exit = mode == "early_exit"
+        threshold = self.block_threshold
+        token_index = snapshot.token_index
+        
+        results = []
+        pending = []
+        for text in texts:
+            analyzed = AnalyzedText.of(text)
+            hits, scored, best_match, max_score = self._exact_stages(
+                snapshot, analyzed, early_exit
+            )
+            if max_score > threshold:
+                results.append((True, max_score, best_match))
+            else:
+                pending.append((
+                    len(results), analyzed, hits, scored, best_match, max_score
+                ))
+                results.append(None)
+        
+        if not pending:
+            return results
+        
+        matrix, always_mask = self._batch_matrix(snapshot)
+        word_sets = [
+            state[1].word_set(token_index.min_word_len) for state in pending
+        ]
+        pair_text, columns, counts, critical = matrix.overlap_counts(word_sets)
+        scores = self._overlap_scores(counts, matrix.sizes[columns], critical)
+        bounds = np.searchsorted(pair_text, np.arange(len(pending) + 1))
+        
+        hit_counter = self._hit_counter()
+        order = snapshot.order
+        key_of = matrix.key_of
+        
+        for i, (position, analyzed, hits, scored, best_match,
+                max_score) in enumerate(pending):
+            lo, hi = bounds[i], bounds[i + 1]
+            pair_columns = columns[lo:hi]
+            pair_scores = scores[lo:hi]
+            
+            # Hit, keyword and single-word patterns are scored one by one
+            keep = ~always_mask[pair_columns]
+            if hits:
+                keep &= ~np.isin(pair_columns, [order[pid] for pid in hits])
+            
+            words = word_sets[i]
+            exact_columns = []
+            exact_scores = []
+            for pattern_id in set(hits).union(snapshot.always):
+                if pattern_id in scored:
+                    continue
+                entry = snapshot.records[pattern_id]
+                tokens = entry.tokens
+                exact_columns.append(order[pattern_id])
+                exact_scores.append(self._check_pattern(
+                    analyzed.text, entry,
+                    text_lower=analyzed.lower,
+                    hits=hits.get(pattern_id, frozenset()),
+                    common=tokens.word_set & words if tokens else frozenset()
+                ))
+            
+            candidate_columns = np.concatenate(
+                (pair_columns[keep], np.asarray(exact_columns, dtype=np.int64))
+            )
+            candidate_scores = np.concatenate(
+                (pair_scores[keep], np.asarray(exact_scores, dtype=np.float64))
+            )
+            by_order = np.argsort(candidate_columns, kind="stable")
+            candidate_columns = candidate_columns[by_order]
+            candidate_scores = candidate_scores[by_order]
+            
+            # Early exit: match() stops at the first pattern above threshold
+            if early_exit:
+                above = np.flatnonzero(candidate_scores > threshold)
+                if above.size:
+                    candidate_columns = candidate_columns[:above[0] + 1]
+                    candidate_scores = candidate_scores[:above[0] + 1]
+            
+            for column in candidate_columns[candidate_scores > 0].tolist():
+                pattern_id = key_of(column)
+                hit_counter[pattern_id] = hit_counter.get(pattern_id, 0) + 1
+            
+            if candidate_scores.size:
+                # argmax takes the first maximum, i.e. the earliest pattern
+                best = int(np.argmax(candidate_scores))
+                if candidate_scores[best] > max_score:
+                    max_score = float(candidate_scores[best])
+                    best_match = key_of(int(candidate_columns[best]))
+            
+            results[position] = (max_score > threshold, max_score, best_match)
+        
+        return results
+    
+    def _batch_matrix(self, snapshot: PatternSnapshot) -> Tuple[TokenMatrix, np.ndarray]:
+        """TokenMatrix of the snapshot plus a mask of its `always` columns"""
+        cached = self._batch_index
+        if cached is not None and cached[0] is snapshot:
+            return cached[1], cached[2]
+        
+        matrix = snapshot.token_index.to_matrix(snapshot.order, CRITICAL_KEYWORDS)
+        always_mask = np.zeros(matrix.n_columns, dtype=bool)
+        always_mask[[snapshot.order[pid] for pid in snapshot.always]] = True
+        
+        self._batch_index = (snapshot, matrix, always_mask)
+        return matrix, always_mask
+    
+    @staticmethod
+    def _overlap_scores(
+        counts: np.ndarray,
+        sizes: np.ndarray,
+        critical: np.ndarray
+    ) -> np.ndarray:
+        """
+        Vectorized prompt-overlap score of _check_pattern for patterns with
+        no exact hit (steps 2 and 3: overlap rule, critical keyword boost).
+        """
+        scores = np.zeros(len(counts), dtype=np.float64)
+        ratio = counts / np.maximum(sizes, 1)
+        
+        short = sizes <= 3
+        scores[short & (counts >= sizes - 1)] = 0.85
+        
+        high = ~short & (ratio > 0.6)
+        scores[high] = 0.9 * ratio[high]
+        
+        partial = ~short & ~high & (ratio > 0.4) & (counts >= 3)
+        scores[partial] = 0.75 * ratio[partial]
+        
+        boosted = (critical > 0) & (scores > 0.0)
+        scores[boosted] = np.minimum(scores[boosted] + 0.15, 1.0)
+        
+        return scores
+    
+    def _exact_stages(
+        self,
+        snapshot: PatternSnapshot,
+        analyzed: AnalyzedText,
+        early_exit: bool,
+        record: Optional[ProfileRecord] = None,
+        hit_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Set[str]], Set[str], Optional[str], float]:
+        """
+        Collect exact-signature hits: one pass over the input finds every
+        exact pattern/prompt/phrase hit, one scan per regex chunk finds
+        every regex hit. Any such hit scores >= 0.8, so in early-exit mode
+        each stage is scored right away and can decide alone.
+        
+        Returns:
+            (hits, scored, best_match, max_score); a max_score above the
+            block threshold means the early-exit decision is made
+        """
         best_match = None
         max_score = 0.0
+        scored = set()
+        
+        text = analyzed.text
+        hits = {}
+        start = time.perf_counter()
+        for pattern_id, field in snapshot.automaton.search(analyzed.lower):
+            hits.setdefault(pattern_id, set()).add(field)
+        if record is not None:
+            record.stage("automaton", time.perf_counter() - start)
+        
+        if early_exit and hits:
+            best_match, max_score = self._score_patterns(
+                snapshot, analyzed,
+                self._by_confidence(hits, snapshot.order),
+                hits, None, scored, best_match, max_score,
+                record=record, hit_ids=hit_ids
+            )
+            if max_score > self.block_threshold:
+                return hits, scored, best_match, max_score
+        
+        start = time.perf_counter()
+        for pattern_id in snapshot.regex_bank.search(text):
+            hits.setdefault(pattern_id, set()).add('regex')
+        if record is not None:
+            record.stage("regex_bank", time.perf_counter() - start)
+            # Merged chunks hide which regex is slow: time each one alone
+            for bank, masked in self._live_regex_banks(snapshot):
+                for pattern_id, seconds in bank.profile(text):
+                    if pattern_id not in masked:
+                        record.pattern(pattern_id, "regex", seconds)
+        
+        if early_exit and len(hits) > len(scored):
+            best_match, max_score = self._score_patterns(
+                snapshot, analyzed,
+                self._by_confidence(hits, snapshot.order, skip=scored),
+                hits, None, scored, best_match, max_score,
+                record=record, hit_ids=hit_ids
+            )
+        
+        return hits, scored, best_match, max_score
+    
+    def _score_patterns(
+        self,
+        snapshot: PatternSnapshot,
+        analyzed: AnalyzedText,
+        pattern_ids: List[str],
+        hits: Dict[str, Set[str]],
+        overlaps: Optional[Dict[str, Set[str]]],
+        scored: Set[str],
+        best_match: Optional[str],
+        max_score: float,
+        stop_above: Optional[float] = None,
+        record: Optional[ProfileRecord] = None,
+        hit_ids: Optional[List[str]] = None
+    ) -> Tuple[Optional[str], float]:
+        """
+        Score pattern_ids in order, updating the running best match.
+        
+        overlaps=None means the token index has not run yet; shared words
+        are then intersected with the input's word set per pattern. Stops
+        early once a score exceeds stop_above. With a profile `record`,
+        each evaluation is timed. Hit pattern IDs are also appended to
+        hit_ids when it is given.
+        """
+        hit_counter = self._hit_counter()
+        records = snapshot.records
+        text = analyzed.text
+        text_lower = analyzed.lower
+        words = None
+        clock = time.perf_counter
+        stage_start = clock()
         
-        for pattern_id, pattern in patterns_snapshot.items():
-            score = self._check_pattern(text, pattern)
+        for pattern_id in pattern_ids:
+            scored.add(pattern_id)
+            entry = records[pattern_id]
+            start = clock() if record is not None else 0.0
+            if overlaps is not None:
+                common = overlaps.get(pattern_id, frozenset())
+            elif entry.tokens is None:
+                common = frozenset()
+            else:
+                if words is None:
+                    words = analyzed.word_set(snapshot.token_index.min_word_len)
+                common = entry.tokens.word_set & words
+            score = self._check_pattern(
+                text, entry,
+                text_lower=text_lower,
+                hits=hits.get(pattern_id, frozenset()),
+                common=common
+            )
+            if record is not None:
+                record.pattern(pattern_id, entry.strategy, clock() - start)
             
             if score > max_score:
                 max_score = score
                 best_match = pattern_id
             
             if score > 0:
-                # Track hit
-                self._track_hit(pattern_id)
+                # Track hit (thread-local, no lock)
+                hit_counter[pattern_id] = hit_counter.get(pattern_id, 0) + 1
+                if hit_ids is not None:
+                    hit_ids.append(pattern_id)
+                
+                if stop_above is not None and score > stop_above:
+                    break
         
-        matched = max_score > 0.5  # Threshold for blocking
+        if record is not None:
+            record.stage("scoring", clock() - stage_start)
         
-        return matched, max_score, best_match
+        return best_match, max_score
+    
+    @staticmethod
+    def _by_confidence(
+        hits: Dict[str, Set[str]],
+        order: Dict[str, int],
+        skip: Optional[Set[str]] = None
+    ) -> List[str]:
+        """Hit patterns ordered by confidence: exact prompt (1.0) first"""
+        pattern_ids = [pid for pid in hits if not skip or pid not in skip]
+        return sorted(
+            pattern_ids,
+            key=lambda pid: ('prompt' not in hits[pid], order[pid])
+        )
     
-    def _check_pattern(self, text: str, pattern: Dict) -> float:
+    def _check_pattern(
+        self,
+        text: str,
+        pattern: Union[PatternRecord, Dict],
+        text_lower: Optional[str] = None,
+        hits: Optional[FrozenSet[str]] = None,
+        common: Optional[Set[str]] = None
+    ) -> float:
         """
         Check if text matches pattern.
         
+        Args:
+            text: Text to check
+            pattern: Load-time PatternRecord, or a raw pattern definition
+                (normalized on the fly, with hits checked directly)
+            text_lower: Precomputed text.lower()
+            hits: Fields ('regex'/'pattern'/'prompt'/'phrase') already found
+                by the compiled indexes. If None, they are checked directly.
+            common: Prompt words shared with the text (from the token index)
+        
         Returns match score (0.0-1.0)
         """
-        import re
-        
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
+        if not isinstance(pattern, PatternRecord):
+            if hits is None:
+                hits = self._direct_hits(text, text_lower, pattern)
+            prompt = pattern.get('prompt')
+            pattern = PatternRecord(
+                pattern,
+                TokenIndex().analyze(prompt.lower()) if isinstance(prompt, str) else None
+            )
+        elif hits is None:
+            hits = frozenset()
         score = 0.0
         
         # Check regex pattern
-        if 'regex' in pattern:
-            try:
-                if re.search(pattern['regex'], text, re.IGNORECASE):
-                    score = 0.9
-            except re.error:
-                pass
+        if 'regex' in hits:
+            score = 0.9
         
         # Check exact pattern
-        if 'pattern' in pattern:
-            if pattern['pattern'].lower() in text_lower:
+        if pattern.has_pattern:
+            if 'pattern' in hits:
                 score = max(score, 0.8)
         
         # Check prompt field (for attack examples)
-        if 'prompt' in pattern:
-            prompt_lower = pattern['prompt'].lower()
-            
+        tokens = pattern.tokens
+        if tokens is not None:
             # 1. Exact phrase match (High confidence)
-            if pattern['prompt'].lower() in text_lower:
+            if 'prompt' in hits:
                 return 1.0
             
-            # 2. Flexible overlap check
-            prompt_words = [w for w in prompt_lower.split() if len(w) > 2] # Ignore small words
-            text_words = [w for w in text_lower.split() if len(w) > 2]
-            
-            if not prompt_words:
+            # 2. Flexible overlap check (words of 3+ chars only)
+            if not tokens.size:
                 return score
-                
-            common = set(prompt_words) & set(text_words)
+            
+            if common is None:
+                common = tokens.word_set & TokenIndex().tokenize(text_lower)
             overlap_count = len(common)
             
             # For short phrases (2-3 words), require high overlap
-            if len(prompt_words) <= 3:
-                if overlap_count >= len(prompt_words) - 1:
+            if tokens.size <= 3:
+                if overlap_count >= tokens.size - 1:
                     score = max(score, 0.85)
             # For longer phrases, use ratio
             else:
-                ratio = overlap_count / len(prompt_words)
+                ratio = overlap_count / tokens.size
                 if ratio > 0.6:  # >60% match
                     score = max(score, 0.9 * ratio)
                 elif ratio > 0.4 and overlap_count >= 3: # >40% match with at least 3 words
                     score = max(score, 0.75 * ratio)
             
             # 3. Critical keyword boost
-            critical_keywords = {'ignore', 'disregard', 'override', 'jailbreak', 'system', 'prompt', 'developer', 'mode'}
-            critical_hits = common & critical_keywords
+            critical_hits = common & CRITICAL_KEYWORDS
             if critical_hits and score > 0.0:
                 score = min(score + 0.15, 1.0)
                 
             # 4. Partial phrase matching (continuous sequence)
             # If 3+ consecutive words match, it's likely an attack
-            if len(prompt_words) >= 4:
-                for i in range(len(prompt_words) - 2):
-                    phrase = " ".join(prompt_words[i:i+3])
-                    if phrase in text_lower:
-                        score = max(score, 0.8)
-                        break
+            if 'phrase' in hits:
+                score = max(score, 0.8)
         
         # Check keywords
-        if 'keywords' in pattern:
-            keywords = pattern['keywords']
-            if isinstance(keywords, str):
-                keywords = [keywords]
-            
-            matches = sum(1 for kw in keywords if kw.lower() in text_lower)
+        keywords = pattern.keywords
+        if keywords is not None:
+            matches = sum(1 for kw in keywords if kw in text_lower)
             if matches > 0:
                 keyword_score = min(0.7, matches / len(keywords))
                 score = max(score, keyword_score)
         
         return score
     
-    def _track_hit(self, pattern_id: str):
-        """Track pattern hit for effectiveness metrics"""
+    def _direct_hits(
+        self,
+        text: str,
+        text_lower: str,
+        pattern: Dict
+    ) -> set:
+        """Uncompiled fallback for _check_pattern on a single pattern"""
+        hits = {
+            field for field in ('pattern', 'prompt')
+            if field in pattern and pattern[field].lower() in text_lower
+        }
+        prompt = pattern.get('prompt')
+        if isinstance(prompt, str) and any(
+            phrase in text_lower for phrase in TokenIndex().phrases(prompt.lower())
+        ):
+            hits.add('phrase')
+        regex = pattern.get('regex')
+        if isinstance(regex, str) and not any(
+            severity == "exponential" for severity, _ in regex_risks(regex)
+        ):
+            try:
+                if RegexBank.compile(regex, re.IGNORECASE).search(text):
+                    hits.add('regex')
+            except re.error:
+                pass
+        return hits
+    
+    def _hit_counter(self) -> Dict[str, int]:
+        """This thread's hit counter shard (registered on first use)"""
+        counter = getattr(self._hit_local, 'counter', None)
+        if counter is None:
+            counter = {}
+            with self._lock:
+                # New threads are where churn shows up: fold dead ones now
+                self._retire_dead_shards()
+                self._hit_shards.append((threading.current_thread(), counter))
+            self._hit_local.counter = counter
+        return counter
+    
+    def record_hits(self, pattern_ids: Iterable[str]):
+        """
+        Count hits collected by an earlier match(hit_ids=...), e.g. when
+        its result is served from a cache, for effectiveness metrics
+        """
+        counter = self._hit_counter()
+        for pattern_id in pattern_ids:
+            counter[pattern_id] = counter.get(pattern_id, 0) + 1
+    
+    def _retire_dead_shards(self):
+        """Fold finished threads' shards into _retired_hits (hold self._lock)"""
+        live = []
+        for thread, counter in self._hit_shards:
+            if not thread.is_alive():
+                # Finished threads never write again; fold them once
+                for pattern_id, hits in counter.items():
+                    self._retired_hits[pattern_id] = \
+                        self._retired_hits.get(pattern_id, 0) + hits
+            else:
+                live.append((thread, counter))
+        self._hit_shards = live
+    
+    def _merge_hits(self) -> Dict[str, int]:
+        """Sum all thread shards (dict.copy() is atomic under the GIL)"""
         with self._lock:
-            self.pattern_stats[pattern_id] = \
-                self.pattern_stats.get(pattern_id, 0) + 1
+            self._retire_dead_shards()
+            
+            merged = self._retired_hits.copy()
+            for _, counter in self._hit_shards:
+                for pattern_id, hits in counter.copy().items():
+                    merged[pattern_id] = merged.get(pattern_id, 0) + hits
+        
+        return merged
     
     def _increment_version(self) -> str:
         """
@@ -296,9 +1208,12 @@ class PatternManager:
             - total_hits: Total pattern matches
             - top_patterns: Most effective patterns
             - version: Current pattern version
+            - last_reload_report: What the last hot_reload() changed
+            - regex_quarantine: Regexes that are not run, and why
+            - regex_flagged: Regexes that may be slow on long inputs
         """
-        with self._lock:
-            stats_snapshot = self.pattern_stats.copy()
+        snapshot = self._snapshot
+        stats_snapshot = self._merge_hits()
         
         # Sort by hit count
         sorted_patterns = sorted(
@@ -308,29 +1223,189 @@ class PatternManager:
         )
         
         return {
-            "total_patterns": len(self.patterns),
+            "total_patterns": len(snapshot.patterns),
             "total_hits": sum(stats_snapshot.values()),
             "top_patterns": sorted_patterns[:10],
-            "version": self.version,
-            "last_reload": datetime.fromtimestamp(self.last_reload).isoformat()
+            "version": snapshot.version,
+            "last_reload": datetime.fromtimestamp(snapshot.loaded_at).isoformat(),
+            "last_reload_report": self.last_reload_report,
+            **self._regex_health(snapshot)
         }
     
+    @staticmethod
+    def _live_regex_banks(snapshot: PatternSnapshot) -> List[Tuple[RegexBank, FrozenSet]]:
+        """(bank, ids masked out of it) for each regex bank of a snapshot"""
+        regex_bank = snapshot.regex_bank
+        if isinstance(regex_bank, LayeredSearch):
+            return [(regex_bank.base, regex_bank.masked), (regex_bank.delta, frozenset())]
+        return [(regex_bank, frozenset())]
+    
+    def _regex_health(self, snapshot: PatternSnapshot) -> Dict:
+        """Quarantined and flagged regexes of the live regex bank(s)"""
+        quarantine = {}
+        flagged = {}
+        for bank, masked in self._live_regex_banks(snapshot):
+            quarantine.update(
+                (pid, info) for pid, info in bank.quarantine_snapshot().items()
+                if pid not in masked
+            )
+            flagged.update(
+                (pid, reason) for pid, reason in bank.flagged.items() if pid not in masked
+            )
+        return {"regex_quarantine": quarantine, "regex_flagged": flagged}
+    
+    def enable_profiling(self, sample_rate: float = 0.01):
+        """
+        Start profiling match() costs (resets earlier measurements).
+        
+        Args:
+            sample_rate: Fraction of calls to time. Sampled calls also run
+                every regex standalone to attribute regex cost, so keep
+                this low in production.
+        """
+        self._profiler = PatternProfiler(sample_rate)
+    
+    def disable_profiling(self):
+        """Stop profiling; the collected data is dropped"""
+        self._profiler = None
+    
+    def get_cost_report(self, top: int = 10) -> Dict:
+        """
+        Where match() time goes, from sampled calls.
+        
+        Returns:
+            Dictionary with:
+            - stages: Cost per pipeline stage (automaton, regex_bank,
+              token_index, scoring)
+            - strategies: Total per match strategy (regex/exact/overlap/keywords)
+            - top_cumulative: Patterns with the highest total cost
+            - top_p99: Patterns with the highest p99 evaluation time
+        """
+        profiler = self._profiler
+        if profiler is None:
+            return {"enabled": False}
+        return profiler.report(top)
+    
     def get_pattern(self, pattern_id: str) -> Optional[Dict]:
         """Get specific pattern by ID"""
-        with self._lock:
-            return self.patterns.get(pattern_id)
+        return self._snapshot.patterns.get(pattern_id)
     
     def list_patterns(self) -> List[str]:
         """List all pattern IDs"""
-        with self._lock:
-            return list(self.patterns.keys())
+        return list(self._snapshot.patterns.keys())
 
 
 # Auto-reload daemon (optional)
+
+# inotify(7) constants (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+    | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class _InotifyWatcher:
+    """
+    Minimal recursive inotify watcher (Linux, via ctypes, no dependencies).
+    
+    wait() blocks until a relevant event arrives, the wake pipe is poked,
+    or the timeout expires.
+    """
+    
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._watches: Dict[int, str] = {}
+        self._add_tree(root)
+    
+    def _add_tree(self, root: str):
+        for dirpath, _, _ in os.walk(root):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dirpath), _IN_WATCH_MASK
+            )
+            if wd >= 0:
+                self._watches[wd] = dirpath
+    
+    def wake(self):
+        """Interrupt wait() (safe to call from a signal handler)"""
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+    
+    def wait(self, timeout: float) -> bool:
+        """Return True if a pattern file (or directory) changed"""
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        
+        if self._wake_r in ready:
+            os.read(self._wake_r, 4096)
+        if self._fd not in ready:
+            return False
+        
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        
+        changed = False
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+            offset += name_len
+            
+            if mask & _IN_Q_OVERFLOW:
+                changed = True
+            elif mask & _IN_ISDIR:
+                changed = True
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and wd in self._watches:
+                    self._add_tree(os.path.join(self._watches[wd], name))
+            elif mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                changed = True
+            elif name.endswith(".json"):
+                changed = True
+        
+        return changed
+    
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
 class PatternAutoReloader:
     """
     Daemon that automatically hot-reloads patterns on file changes.
     
+    Backends:
+    - "inotify": kernel change notifications (Linux), reacts in milliseconds
+      without scanning the filesystem
+    - "poll": per-file stat cache compared every `check_interval` seconds
+      (detects additions, edits and deletions)
+    - "auto": inotify when available, else poll
+    
+    Bursts of writes are debounced into a single reload. With
+    handle_sighup=True, `kill -HUP <pid>` forces a reload.
+    
     Usage:
         reloader = PatternAutoReloader(pattern_manager, check_interval=60)
         reloader.start()
@@ -339,40 +1414,125 @@ class PatternAutoReloader:
         reloader.stop()
     """
     
-    def __init__(self, pattern_manager: PatternManager, check_interval: int = 60):
+    BACKENDS = ("auto", "inotify", "poll")
+    
+    def __init__(
+        self,
+        pattern_manager: PatternManager,
+        check_interval: int = 60,
+        debounce: float = 0.25,
+        max_delay: float = 2.0,
+        backend: str = "auto",
+        handle_sighup: bool = False
+    ):
         """
         Initialize auto-reloader.
         
         Args:
             pattern_manager: PatternManager instance
-            check_interval: Seconds between checks
+            check_interval: Seconds between checks (poll backend)
+            debounce: Quiet period after the last change before reloading
+            max_delay: Reload at the latest this long after the first change
+                of a burst, even if writes keep arriving
+            backend: "auto" | "inotify" | "poll"
+            handle_sighup: Install a SIGHUP handler that triggers a reload
+                (main thread only, ignored where SIGHUP does not exist)
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Available: {self.BACKENDS}")
+        
         self.pattern_manager = pattern_manager
         self.check_interval = check_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.handle_sighup = handle_sighup
+        self.requested_backend = backend
+        self.backend = None
+        self.reload_count = 0
         self._running = False
         self._thread = None
-        self._last_mtime = self._get_directory_mtime()
+        self._inotify = None
+        self._wake = threading.Event()
+        self._reload_requested = False
+        self._previous_sighup = None
+        self._file_stats = self._stat_files()
     
-    def _get_directory_mtime(self) -> float:
-        """Get latest modification time of pattern directory"""
-        try:
-            mtimes = []
-            for json_file in Path(self.pattern_manager.patterns_dir).rglob("*.json"):
-                mtimes.append(os.path.getmtime(json_file))
-            return max(mtimes) if mtimes else 0
-        except:
-            return 0
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        """Stat cache of pattern files: {path: (mtime_ns, size)}"""
+        stats = {}
+        stack = [self.pattern_manager.patterns_dir]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(".json"):
+                            st = entry.stat()
+                            stats[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return stats
+    
+    def _poll_changed(self) -> bool:
+        """Compare the stat cache (catches deletions, unlike max mtime)"""
+        current = self._stat_files()
+        changed = current != self._file_stats
+        self._file_stats = current
+        return changed
+    
+    def trigger(self):
+        """Request a reload as soon as possible (signal-safe)"""
+        self._reload_requested = True
+        self._wake.set()
+        if self._inotify is not None:
+            self._inotify.wake()
+    
+    def _on_sighup(self, signum, frame):
+        self.trigger()
     
     def _reload_loop(self):
-        """Background loop that checks for changes"""
+        """Background loop: wait for changes, debounce, reload"""
+        first_change = None
+        last_change = None
+        
         while self._running:
-            time.sleep(self.check_interval)
+            if first_change is not None:
+                timeout = self.debounce
+            elif self._inotify is not None:
+                timeout = 1.0
+            else:
+                timeout = self.check_interval
+            
+            if self._inotify is not None:
+                changed = self._inotify.wait(timeout)
+            else:
+                self._wake.wait(timeout)
+                self._wake.clear()
+                changed = self._running and self._poll_changed()
             
-            current_mtime = self._get_directory_mtime()
-            if current_mtime > self._last_mtime:
-                print("📁 Pattern files changed, triggering hot-reload...")
+            if not self._running:
+                break
+            
+            now = time.monotonic()
+            if changed:
+                last_change = now
+                if first_change is None:
+                    first_change = now
+            
+            settled = first_change is not None and (
+                now - last_change >= self.debounce
+                or now - first_change >= self.max_delay
+            )
+            
+            if self._reload_requested or settled:
+                reason = "SIGHUP/trigger" if self._reload_requested else "files changed"
+                self._reload_requested = False
+                first_change = last_change = None
+                
+                print(f"📁 Pattern reload ({reason}), triggering hot-reload...")
                 if self.pattern_manager.hot_reload():
-                    self._last_mtime = current_mtime
+                    self.reload_count += 1
     
     def start(self):
         """Start auto-reload daemon"""
@@ -380,14 +1540,52 @@ class PatternAutoReloader:
             print("⚠️  Auto-reloader already running")
             return
         
+        self.backend = "poll"
+        if self.requested_backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _InotifyWatcher(self.pattern_manager.patterns_dir)
+                self.backend = "inotify"
+            except (OSError, AttributeError) as e:
+                if self.requested_backend == "inotify":
+                    raise
+                print(f"⚠️  inotify unavailable ({e}), falling back to polling")
+        elif self.requested_backend == "inotify":
+            raise OSError("inotify backend requires Linux")
+        
+        if self.handle_sighup:
+            self._install_sighup()
+        
+        self._file_stats = self._stat_files()
         self._running = True
         self._thread = threading.Thread(target=self._reload_loop, daemon=True)
         self._thread.start()
-        print(f"✓ Pattern auto-reloader started (interval: {self.check_interval}s)")
+        
+        if self.backend == "inotify":
+            print(f"✓ Pattern auto-reloader started (inotify, debounce: {self.debounce}s)")
+        else:
+            print(f"✓ Pattern auto-reloader started (interval: {self.check_interval}s)")
+    
+    def _install_sighup(self):
+        if not hasattr(signal, "SIGHUP"):
+            print("⚠️  SIGHUP not available on this platform")
+            return
+        if threading.current_thread() is not threading.main_thread():
+            print("⚠️  SIGHUP handler can only be installed from the main thread")
+            return
+        self._previous_sighup = signal.signal(signal.SIGHUP, self._on_sighup)
     
     def stop(self):
         """Stop auto-reload daemon"""
         self._running = False
+        self._wake.set()
+        if self._inotify is not None:
+            self._inotify.wake()
         if self._thread:
             self._thread.join(timeout=5)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._previous_sighup is not None:
+            signal.signal(signal.SIGHUP, self._previous_sighup)
+            self._previous_sighup = None
         print("✓ Pattern auto-reloader stopped")
@@ -0,0 +1,609 @@
+"""
+Precompiled Pattern Packs
+
+Versioned, checksummed binary form of a compiled attack DB:
+- Normalized pattern ids and definitions
+- The Aho-Corasick automaton as flat arrays
+- The prompt token index (vocabulary + postings)
+- Regex sources (compiled once at load)
+
+Packs are memory-mapped read-only, so cold start does not glob or parse
+the attack DB and forked workers share the same physical pages.
+
+Usage:
+    # Build (or: promptshield-compile promptshield/attack_db -o attack_db.pspack)
+    compile_pack("promptshield/attack_db", "attack_db.pspack")
+
+    # Load
+    manager = PatternManager("promptshield/attack_db", pack_path="attack_db.pspack")
+"""
+
+import hashlib
+import json
+import mmap
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .pattern_index import (
+    LayeredSearch, PatternRecord, PatternSnapshot, PromptTokens, RegexBank,
+    TokenIndex, TokenMatrix,
+)
+
+PACK_MAGIC = b"PSPACK\x00\x01"
+PACK_FORMAT_VERSION = 2  # 2: added tok.sizes
+
+_PREAMBLE = array("I", [0, 0]).itemsize * 2 + len(PACK_MAGIC)
+_FIELDS = ("pattern", "prompt", "phrase")
+_FIELD_CODES = {field: code for code, field in enumerate(_FIELDS)}
+_EDGE_CACHE_NODES = 1 << 16  # decoded automaton nodes kept per pack
+
+
+class PackError(Exception):
+    """Raised when a pattern pack is missing, corrupt or incompatible"""
+    pass
+
+
+# ========================================
+# Writing
+# ========================================
+
+def _string_table(strings: List[str], with_hash: bool = False) -> Dict[str, bytes]:
+    """Encode strings as offsets + blob (+ open-addressing hash slots)"""
+    encoded = [s.encode("utf-8") for s in strings]
+
+    offsets = array("Q", [0])
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+
+    table = {"offsets": offsets.tobytes(), "blob": b"".join(encoded)}
+
+    if with_hash:
+        size = 1
+        while size < max(2 * len(encoded), 8):
+            size *= 2
+        slots = array("I", [0]) * size
+        mask = size - 1
+        for index, raw in enumerate(encoded):
+            slot = zlib.crc32(raw) & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = index + 1
+        table["hash"] = slots.tobytes()
+
+    return table
+
+
+def write_pack(snapshot: PatternSnapshot, path: str, source: str = "") -> Dict:
+    """
+    Serialize a compiled snapshot to `path`.
+
+    Returns:
+        The pack header (counts, checksum, section table)
+    """
+    patterns = snapshot.patterns
+    pattern_ids = list(patterns)
+    ordinal = {pattern_id: i for i, pattern_id in enumerate(pattern_ids)}
+
+    # Layered (incrementally reloaded) indexes are flattened by a rebuild
+    automaton = snapshot.automaton
+    regex_bank = snapshot.regex_bank
+    token_index = snapshot.token_index
+    if (isinstance(automaton, LayeredSearch) or isinstance(regex_bank, LayeredSearch)
+            or not isinstance(token_index, TokenIndex)):
+        raise PackError("Pack needs a fully compiled snapshot; rebuild from JSON first")
+
+    sections: Dict[str, bytes] = {}
+
+    def add_table(name, strings, with_hash=False):
+        for part, data in _string_table(strings, with_hash).items():
+            sections[f"{name}.{part}"] = data
+
+    add_table("ids", [str(pattern_id) for pattern_id in pattern_ids], with_hash=True)
+    add_table("defs", [
+        json.dumps(patterns[pattern_id], ensure_ascii=False, separators=(",", ":"))
+        for pattern_id in pattern_ids
+    ])
+
+    # Automaton: per-node sorted edges, fail/dict links, outputs
+    goto, fail, dict_link, output, entries = automaton.export()
+    edge_start = array("I", [0])
+    edge_chars = array("I")
+    edge_targets = array("I")
+    out_start = array("I", [0])
+    out_entries = array("I")
+    for node, edges in enumerate(goto):
+        for ch in sorted(edges):
+            edge_chars.append(ord(ch))
+            edge_targets.append(edges[ch])
+        edge_start.append(len(edge_chars))
+        out_entries.extend(output[node])
+        out_start.append(len(out_entries))
+
+    entry_ordinals = array("I")
+    entry_fields = array("B")
+    entry_verify = array("I")  # index + 1 into ac_verify, 0 = exact anchor
+    verify_strings = []
+    for (pattern_id, field), verify in entries:
+        entry_ordinals.append(ordinal[pattern_id])
+        entry_fields.append(_FIELD_CODES[field])
+        if verify is None:
+            entry_verify.append(0)
+        else:
+            verify_strings.append(verify)
+            entry_verify.append(len(verify_strings))
+
+    sections.update({
+        "ac.edge_start": edge_start.tobytes(),
+        "ac.edge_chars": edge_chars.tobytes(),
+        "ac.edge_targets": edge_targets.tobytes(),
+        "ac.fail": array("I", fail).tobytes(),
+        "ac.dict_link": array("I", dict_link).tobytes(),
+        "ac.out_start": out_start.tobytes(),
+        "ac.out": out_entries.tobytes(),
+        "ac.entry_ordinal": entry_ordinals.tobytes(),
+        "ac.entry_field": entry_fields.tobytes(),
+        "ac.entry_verify": entry_verify.tobytes(),
+    })
+    add_table("ac_verify", verify_strings)
+
+    # Token index: vocabulary -> postings of pattern ordinals
+    vocab = sorted(token_index.postings)
+    post_start = array("I", [0])
+    post_ordinals = array("I")
+    for word in vocab:
+        post_ordinals.extend(ordinal[key] for key in token_index.postings[word])
+        post_start.append(len(post_ordinals))
+    add_table("vocab", vocab, with_hash=True)
+    sections["tok.post_start"] = post_start.tobytes()
+    sections["tok.post"] = post_ordinals.tobytes()
+    sizes = array("I", [0]) * len(pattern_ids)
+    for key, entry in token_index.entries.items():
+        sizes[ordinal[key]] = entry.size
+    sections["tok.sizes"] = sizes.tobytes()
+    sections["always"] = array("I", [ordinal[key] for key in snapshot.always]).tobytes()
+
+    # Lay out sections 8-byte aligned and checksum the payload
+    payload = bytearray()
+    table = {}
+    for name, data in sections.items():
+        payload.extend(b"\0" * (-len(payload) % 8))
+        table[name] = [len(payload), len(data)]
+        payload.extend(data)
+
+    header = {
+        "format": PACK_FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "db_version": snapshot.version,
+        "created": time.time(),
+        "source": source,
+        "pattern_count": len(pattern_ids),
+        "min_word_len": token_index.min_word_len,
+        "ac_max_depth": automaton.max_depth,
+        "regex": [[ordinal[key], src] for key, src in regex_bank.sources()],
+        "sections": table,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-(_PREAMBLE + len(header_bytes)) % 8)
+
+    with open(path, "wb") as f:
+        f.write(PACK_MAGIC)
+        f.write(array("I", [PACK_FORMAT_VERSION, len(header_bytes)]).tobytes())
+        f.write(header_bytes)
+        f.write(payload)
+
+    return header
+
+
+def compile_pack(patterns_dir: str, output_path: str) -> Dict:
+    """Load and compile an attack DB directory, then write it as a pack"""
+    from .pattern_manager import PatternManager
+
+    manager = PatternManager(patterns_dir)
+    return write_pack(manager.snapshot, output_path, source=patterns_dir)
+
+
+# ========================================
+# Reading (memory-mapped)
+# ========================================
+
+class _StringTable:
+    """Read-only view of a string table section inside the mmap"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview,
+                 slots: Optional[memoryview] = None):
+        self._offsets = offsets
+        self._blob = blob
+        self._slots = slots
+        self._mask = len(slots) - 1 if slots is not None else 0
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def __getitem__(self, index: int) -> str:
+        return self.raw(index).decode("utf-8")
+
+    def find(self, value: str) -> int:
+        """Index of value, or -1 (needs the hash slots)"""
+        raw = value.encode("utf-8")
+        slots = self._slots
+        mask = self._mask
+        slot = zlib.crc32(raw) & mask
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return -1
+            if self.raw(entry - 1) == raw:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+
+class PackedPatterns(Mapping):
+    """pattern_id -> definition, decoded lazily from the pack"""
+
+    def __init__(self, ids: _StringTable, defs: _StringTable, cache_size: int = 4096):
+        self._ids = ids
+        self._defs = defs
+        self._cache: Dict[int, Dict] = {}
+        self._cache_size = cache_size
+        # Ids handed out so far, both ways (ids are what match() passes around)
+        self._id_of: Dict[int, str] = {}
+        self._ordinal_of: Dict[str, int] = {}
+
+    def ordinal(self, pattern_id) -> int:
+        ordinal = self._ordinal_of.get(pattern_id)
+        if ordinal is None:
+            if not isinstance(pattern_id, str):
+                return -1
+            ordinal = self._ids.find(pattern_id)
+        return ordinal
+
+    def pattern_id(self, ordinal: int) -> str:
+        pattern_id = self._id_of.get(ordinal)
+        if pattern_id is None:
+            pattern_id = self._ids[ordinal]
+            self._id_of[ordinal] = pattern_id
+            self._ordinal_of[pattern_id] = ordinal
+        return pattern_id
+
+    def by_ordinal(self, ordinal: int) -> Dict:
+        pattern = self._cache.get(ordinal)
+        if pattern is None:
+            pattern = json.loads(self._defs.raw(ordinal))
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[ordinal] = pattern
+        return pattern
+
+    def __getitem__(self, pattern_id) -> Dict:
+        ordinal = self.ordinal(pattern_id)
+        if ordinal < 0:
+            raise KeyError(pattern_id)
+        return self.by_ordinal(ordinal)
+
+    def __contains__(self, pattern_id) -> bool:
+        return self.ordinal(pattern_id) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._ids[i] for i in range(len(self._ids)))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class _PackedOrder(Mapping):
+    """pattern_id -> load position, answered from the id hash table"""
+
+    def __init__(self, patterns: PackedPatterns):
+        self._patterns = patterns
+
+    def __getitem__(self, pattern_id) -> int:
+        ordinal = self._patterns.ordinal(pattern_id)
+        if ordinal < 0:
+            raise KeyError(pattern_id)
+        return ordinal
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._patterns)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+class PackedAutomaton:
+    """Aho-Corasick search directly over the pack's flat arrays"""
+
+    def __init__(self, arrays: Dict[str, memoryview], verify: _StringTable,
+                 patterns: PackedPatterns, max_depth: int):
+        self._edge_start = arrays["ac.edge_start"]
+        self._edge_chars = arrays["ac.edge_chars"]
+        self._edge_targets = arrays["ac.edge_targets"]
+        self._fail = arrays["ac.fail"]
+        self._dict_link = arrays["ac.dict_link"]
+        self._out_start = arrays["ac.out_start"]
+        self._out = arrays["ac.out"]
+        self._entry_ordinal = arrays["ac.entry_ordinal"]
+        self._entry_field = arrays["ac.entry_field"]
+        self._entry_verify = arrays["ac.entry_verify"]
+        self._verify = verify
+        self._patterns = patterns
+        self.max_depth = max_depth
+
+        # Edges of nodes that searches actually reach are decoded into
+        # dicts on first use; the rest of the trie stays in the mmap
+        self._edges: Dict[int, Dict[str, int]] = {}
+        self._root = self.edges(0)
+
+    def edges(self, node: int) -> Dict[str, int]:
+        """Outgoing transitions of node as {char: target}"""
+        edges = self._edges.get(node)
+        if edges is None:
+            lo, hi = self._edge_start[node], self._edge_start[node + 1]
+            edges = dict(zip(
+                map(chr, self._edge_chars[lo:hi]), self._edge_targets[lo:hi]
+            ))
+            if len(self._edges) >= _EDGE_CACHE_NODES:
+                self._edges = {0: self._root}
+            self._edges[node] = edges
+        return edges
+
+    def search(self, text: str) -> Set[Tuple[str, str]]:
+        root = self._root
+        fail = self._fail
+        dict_link = self._dict_link
+        out_start = self._out_start
+
+        matched = list(self._out[out_start[0]:out_start[1]])
+        visited = set()
+        node = 0
+
+        cache = self._edges
+        edges_of = self.edges
+
+        for ch in text:
+            while node:
+                edges = cache.get(node)
+                if edges is None:
+                    edges = edges_of(node)
+                    cache = self._edges
+                nxt = edges.get(ch)
+                if nxt is not None:
+                    node = nxt
+                    break
+                node = fail[node]
+            else:
+                node = root.get(ch, 0)
+
+            hit = node
+            while hit and hit not in visited:
+                visited.add(hit)
+                lo, hi = out_start[hit], out_start[hit + 1]
+                if lo != hi:
+                    matched.extend(self._out[lo:hi])
+                hit = dict_link[hit]
+
+        found = set()
+        for entry in matched:
+            verify = self._entry_verify[entry]
+            if verify and self._verify[verify - 1] not in text:
+                continue
+            found.add((
+                self._patterns.pattern_id(self._entry_ordinal[entry]),
+                _FIELDS[self._entry_field[entry]],
+            ))
+        return found
+
+    def __len__(self) -> int:
+        return len(self._entry_ordinal)
+
+
+class _LazyPromptTokens(Mapping):
+    """pattern_id -> PromptTokens, analyzed from the prompt on first use"""
+
+    def __init__(self, index: "PackedTokenIndex", patterns: PackedPatterns):
+        self._index = index
+        self._patterns = patterns
+        self._cache: Dict[str, Optional[PromptTokens]] = {}
+
+    def get(self, pattern_id, default=None):
+        if pattern_id not in self._cache:
+            pattern = self._patterns.get(pattern_id)
+            prompt = pattern.get('prompt') if pattern else None
+            self._cache[pattern_id] = (
+                self._index.analyze(prompt.lower()) if isinstance(prompt, str) else None
+            )
+        entry = self._cache[pattern_id]
+        return default if entry is None else entry
+
+    def __getitem__(self, pattern_id) -> PromptTokens:
+        entry = self.get(pattern_id)
+        if entry is None:
+            raise KeyError(pattern_id)
+        return entry
+
+    def __iter__(self):
+        return (pid for pid in self._patterns if self.get(pid) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _LazyRecords(Mapping):
+    """pattern_id -> PatternRecord, normalized on first use"""
+
+    def __init__(self, patterns: PackedPatterns, tokens: _LazyPromptTokens):
+        self._patterns = patterns
+        self._tokens = tokens
+        self._cache: Dict[str, PatternRecord] = {}
+
+    def __getitem__(self, pattern_id) -> PatternRecord:
+        record = self._cache.get(pattern_id)
+        if record is None:
+            record = PatternRecord(
+                self._patterns[pattern_id], self._tokens.get(pattern_id)
+            )
+            self._cache[pattern_id] = record
+        return record
+
+    def __iter__(self):
+        return iter(self._patterns)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+class PackedTokenIndex(TokenIndex):
+    """TokenIndex whose vocabulary and postings live in the pack"""
+
+    def __init__(self, vocab: _StringTable, post_start: memoryview,
+                 post: memoryview, sizes: memoryview, patterns: PackedPatterns,
+                 always: List[str], min_word_len: int):
+        super().__init__(min_word_len)
+        self._vocab = vocab
+        self._post_start = post_start
+        self._post = post
+        self._sizes = sizes
+        self._patterns = patterns
+        self.always = always
+        self.entries = _LazyPromptTokens(self, patterns)
+
+    def overlaps(self, text_words) -> Dict[Hashable, Set[str]]:
+        common: Dict[Hashable, Set[str]] = {}
+        pattern_id = self._patterns.pattern_id
+
+        for word in text_words:
+            index = self._vocab.find(word)
+            if index < 0:
+                continue
+            lo, hi = self._post_start[index], self._post_start[index + 1]
+            for ordinal in self._post[lo:hi]:
+                key = pattern_id(ordinal)
+                shared = common.get(key)
+                if shared is None:
+                    common[key] = {word}
+                else:
+                    shared.add(word)
+
+        return common
+
+    def vocabulary(self) -> List[str]:
+        vocab = self._vocab
+        return [vocab[row] for row in range(len(vocab))]
+
+    def to_matrix(self, order, critical=()) -> TokenMatrix:
+        """Postings are already CSR over pattern ordinals; wrap, don't copy"""
+        find = self._vocab.find
+
+        def row_of(word):
+            row = find(word)
+            return row if row >= 0 else None
+
+        return TokenMatrix(
+            row_of,
+            self._patterns.pattern_id,
+            np.frombuffer(self._post_start, dtype=np.uint32).astype(np.int64),
+            np.frombuffer(self._post, dtype=np.uint32).astype(np.int64),
+            np.frombuffer(self._sizes, dtype=np.uint32).astype(np.int64),
+            critical
+        )
+
+    def patched(self, removed, added):
+        raise PackError("Packed token index is read-only; rebuild from JSON")
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+def read_pack_header(path: str) -> Dict:
+    """Read and sanity-check a pack header without mapping the payload"""
+    with open(path, "rb") as f:
+        preamble = f.read(_PREAMBLE)
+        if len(preamble) != _PREAMBLE or not preamble.startswith(PACK_MAGIC):
+            raise PackError(f"{path} is not a PromptShield pattern pack")
+        fmt, header_len = array("I", preamble[len(PACK_MAGIC):])
+        if fmt != PACK_FORMAT_VERSION:
+            raise PackError(f"Unsupported pack format {fmt} (expected {PACK_FORMAT_VERSION})")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    if header.get("byteorder") != sys.byteorder:
+        raise PackError("Pack was built on a machine with different byte order")
+    header["_payload_offset"] = _PREAMBLE + header_len
+    return header
+
+
+def load_pack(path: str, verify: bool = True) -> PatternSnapshot:
+    """
+    Memory-map a pack and expose it as a PatternSnapshot.
+
+    Args:
+        path: Pack file written by write_pack()/compile_pack()
+        verify: Check the payload SHA-256 (reads the file once)
+
+    Raises:
+        PackError: Missing, corrupt or incompatible pack
+    """
+    try:
+        header = read_pack_header(path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise PackError(f"Cannot open pattern pack {path}: {e}")
+
+    payload = memoryview(mm)[header["_payload_offset"]:]
+    if verify and hashlib.sha256(payload).hexdigest() != header["sha256"]:
+        raise PackError(f"Pattern pack {path} failed checksum verification")
+
+    sections = header["sections"]
+    typecodes = {"blob": "B", "offsets": "Q", "ac.entry_field": "B"}
+
+    def view(name: str) -> memoryview:
+        if name not in sections:
+            raise PackError(f"Pattern pack {path} has no {name} section; recompile it")
+        offset, length = sections[name]
+        raw = payload[offset:offset + length]
+        code = typecodes.get(name.rsplit(".", 1)[-1], typecodes.get(name, "I"))
+        return raw if code == "B" else raw.cast(code)
+
+    def table(name: str, with_hash: bool = False) -> _StringTable:
+        return _StringTable(
+            view(f"{name}.offsets"), view(f"{name}.blob"),
+            view(f"{name}.hash") if with_hash else None
+        )
+
+    patterns = PackedPatterns(table("ids", with_hash=True), table("defs"))
+    automaton = PackedAutomaton(
+        {name: view(name) for name in sections if name.startswith("ac.")},
+        table("ac_verify"), patterns, header["ac_max_depth"]
+    )
+    always = tuple(patterns.pattern_id(ordinal) for ordinal in view("always"))
+    token_index = PackedTokenIndex(
+        table("vocab", with_hash=True), view("tok.post_start"), view("tok.post"),
+        view("tok.sizes"), patterns, list(always), header["min_word_len"]
+    )
+
+    regex_bank = RegexBank()
+    for ordinal, source in header["regex"]:
+        regex_bank.add(patterns.pattern_id(ordinal), source)
+    regex_bank.build()
+
+    return PatternSnapshot(
+        version=header["db_version"],
+        loaded_at=time.time(),
+        patterns=patterns,
+        records=_LazyRecords(patterns, token_index.entries),
+        automaton=automaton,
+        regex_bank=regex_bank,
+        token_index=token_index,
+        order=_PackedOrder(patterns),
+        always=always,
+        base_patterns=patterns,
+    )
@@ -0,0 +1,169 @@
+"""
+Pattern Cost Profiling
+
+Opt-in, sampled profiling of PatternManager.match:
+- Time per pipeline stage (automaton, regex bank, token index, scoring)
+- Time per pattern id and match strategy (regex / exact / overlap / keywords)
+- Cumulative, mean and p99 per entry from log-scale histograms
+
+Only sampled calls pay for timing; other calls see one counter bump.
+
+Usage:
+    manager.enable_profiling(sample_rate=0.01)
+    ...
+    report = manager.get_cost_report(top=10)
+"""
+
+import itertools
+import math
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+STRATEGIES = ("regex", "exact", "overlap", "keywords")
+
+
+class CostHistogram:
+    """
+    Log-scale latency histogram (4 buckets per doubling, ~19% resolution).
+
+    Constant memory per entry no matter how many samples it sees, which is
+    what makes per-pattern p99 affordable on large DBs.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    _PER_OCTAVE = 4
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        # Bucket by microseconds; everything under 1us shares bucket 0
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * self._PER_OCTAVE) + 1 if micros > 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, in seconds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = 2 ** (index / self._PER_OCTAVE) / 1e6 if index else 1e-6
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "evaluations": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class PatternProfiler:
+    """
+    Collects stage and per-pattern costs for sampled match() calls.
+
+    Writers are sampled calls only, so a single lock is cheap enough.
+    """
+
+    def __init__(self, sample_rate: float = 0.01):
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.sample_rate = sample_rate
+        self._period = max(1, round(1 / sample_rate))
+        self._calls = itertools.count()
+        self._lock = threading.Lock()
+        self.sampled_calls = 0
+        self.stages: Dict[str, CostHistogram] = {}
+        self.patterns: Dict[Tuple[Hashable, str], CostHistogram] = {}
+
+    def sample(self) -> bool:
+        """Whether this call should be profiled (every 1/sample_rate-th)"""
+        return next(self._calls) % self._period == 0
+
+    def begin(self) -> "ProfileRecord":
+        return ProfileRecord()
+
+    def commit(self, record: "ProfileRecord"):
+        """Fold one profiled call into the totals"""
+        with self._lock:
+            self.sampled_calls += 1
+            for stage, seconds in record.stages:
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = CostHistogram()
+                histogram.add(seconds)
+            for key, seconds in record.patterns:
+                histogram = self.patterns.get(key)
+                if histogram is None:
+                    histogram = self.patterns[key] = CostHistogram()
+                histogram.add(seconds)
+
+    def report(self, top: int = 10) -> Dict:
+        with self._lock:
+            entries = [
+                {"pattern_id": pattern_id, "strategy": strategy, **histogram.summary()}
+                for (pattern_id, strategy), histogram in self.patterns.items()
+            ]
+            stages = {name: h.summary() for name, h in self.stages.items()}
+            sampled = self.sampled_calls
+
+        strategies = {}
+        for strategy in STRATEGIES:
+            rows = [e for e in entries if e["strategy"] == strategy]
+            strategies[strategy] = {
+                "patterns": len(rows),
+                "evaluations": sum(e["evaluations"] for e in rows),
+                "total_ms": sum(e["total_ms"] for e in rows),
+            }
+
+        return {
+            "enabled": True,
+            "sample_rate": self.sample_rate,
+            "sampled_calls": sampled,
+            "stages": stages,
+            "strategies": strategies,
+            "top_cumulative": sorted(entries, key=lambda e: -e["total_ms"])[:top],
+            "top_p99": sorted(entries, key=lambda e: -e["p99_ms"])[:top],
+        }
+
+
+class ProfileRecord:
+    """Costs of one profiled call, committed in one go"""
+
+    __slots__ = ("stages", "patterns")
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.patterns: List[Tuple[Tuple[Hashable, str], float]] = []
+
+    def stage(self, name: str, seconds: float):
+        self.stages.append((name, seconds))
+
+    def pattern(self, pattern_id: Hashable, strategy: str, seconds: float):
+        self.patterns.append(((pattern_id, strategy), seconds))
+
+
+def pattern_strategy(pattern: Dict) -> str:
+    """Strategy a pattern's scoring cost is attributed to"""
+    if 'keywords' in pattern:
+        return "keywords"
+    if 'prompt' in pattern:
+        return "overlap"
+    if 'pattern' in pattern:
+        return "exact"
+    return "regex"
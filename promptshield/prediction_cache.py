@@ -0,0 +1,133 @@
+"""
+Prediction Cache
+
+Bounded LRU + TTL cache for per-input stage results (pattern match, ML
+score). Retries and templated prompts repeat identical inputs, so the
+same text is often checked many times within a few minutes.
+
+Keys are built with make_key(stage, text, *versions): the text is hashed
+(long inputs are not kept in memory) and the versions (pattern snapshot,
+model files) are part of the key, so a hot reload or a model swap never
+serves a stale result; old entries simply age out.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+    
+    Features:
+    - Size bound (least recently used entry evicted first)
+    - TTL bound (expired entries are dropped on access)
+    - Hit / miss / eviction / expiration counters
+    
+    Usage:
+        cache = PredictionCache(max_size=10000, ttl_seconds=300)
+        
+        key = PredictionCache.make_key("ml", text, model_version)
+        score = cache.get_or_compute(key, lambda: model_score(text))
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 300.0):
+        """
+        Initialize prediction cache.
+        
+        Args:
+            max_size: Maximum number of entries
+            ttl_seconds: Entry lifetime (None = no expiry)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def make_key(stage: str, text: str, *versions: Hashable) -> Tuple:
+        """Cache key for one stage's result on text under the given versions"""
+        digest = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        return (stage, digest) + versions
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value, or default if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any):
+        """Store value, evicting the least recently used entry if full"""
+        expires_at = (
+            time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None
+            else float("inf")
+        )
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Cached value, or compute() stored under key.
+        
+        compute() runs outside the lock: concurrent misses on the same key
+        may both compute, and the last one stored wins.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict:
+        """Cache size and hit/miss/eviction metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
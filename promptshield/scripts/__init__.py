@@ -0,0 +1,3 @@
+"""
+PromptShield Command-Line Scripts
+"""
@@ -0,0 +1,59 @@
+"""
+Compile an attack DB directory into a precompiled pattern pack.
+
+Usage:
+    promptshield-compile promptshield/attack_db -o attack_db.pspack
+    promptshield-compile --info attack_db.pspack
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from ..pattern_pack import PackError, compile_pack, load_pack, read_pack_header
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="promptshield-compile",
+        description="Compile pattern JSON files into a memory-mappable pack"
+    )
+    parser.add_argument("patterns_dir", nargs="?", default="promptshield/attack_db",
+                        help="Directory containing pattern JSON files")
+    parser.add_argument("-o", "--output", default="attack_db.pspack",
+                        help="Pack file to write")
+    parser.add_argument("--info", metavar="PACK",
+                        help="Print the header of an existing pack and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.info:
+            load_pack(args.info)  # verifies the checksum
+            header = read_pack_header(args.info)
+            header.pop("_payload_offset", None)
+            header.pop("regex", None)
+            print(json.dumps(header, indent=2))
+            return 0
+
+        start = time.perf_counter()
+        # Write next to the target and rename, so running workers never map
+        # a half-written pack
+        tmp_path = f"{args.output}.tmp"
+        header = compile_pack(args.patterns_dir, tmp_path)
+        os.replace(tmp_path, args.output)
+    except PackError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"✓ Wrote {args.output}: {header['pattern_count']} patterns, "
+        f"{os.path.getsize(args.output)} bytes in {elapsed:.1f}ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+PromptShield Semantic Matching Module
+
+Storage and search helpers for attack embeddings.
+"""
+
+from .ann import ANN_INDEXES, IVFIndex, exact_search, top_k
+from .batcher import MicroBatcher
+from .embedding_cache import EmbeddingCache, corpus_key, text_keys
+from .quantized import QUANTIZATIONS, QuantizedEmbeddings
+
+__all__ = [
+    "ANN_INDEXES",
+    "IVFIndex",
+    "MicroBatcher",
+    "exact_search",
+    "top_k",
+    "EmbeddingCache",
+    "corpus_key",
+    "text_keys",
+    "QUANTIZATIONS",
+    "QuantizedEmbeddings",
+]
@@ -0,0 +1,138 @@
+"""
+Approximate Nearest-Neighbour Index for Attack Embeddings
+
+Pure-NumPy IVF (inverted file) index over unit-norm embeddings:
+- Build: spherical k-means on a sample picks n_lists centroids, then
+  every embedding is assigned to its closest centroid
+- Search: the query is compared to all centroids, the n_probe closest
+  lists are gathered, and their members are re-ranked with exact dot
+  products against the original embeddings
+
+n_probe is the recall/latency knob: 1 scans ~1/n_lists of the corpus,
+n_probe=n_lists is an exact (brute-force) search. Embeddings are only
+referenced, never copied, so a memory-mapped cache stays shared.
+
+Usage:
+    index = IVFIndex(embeddings, n_probe=8)
+    ids, scores = index.search(query_vec, k=1)
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+ANN_INDEXES = ("exact", "ivf")
+
+# Rows per block when assigning the corpus to centroids (bounds temp memory)
+_ASSIGN_BLOCK = 16384
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")].astype(np.int64)
+
+
+def exact_search(embeddings: np.ndarray, query: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Brute-force top-k by dot product: (ids, scores), best first"""
+    scores = np.dot(embeddings, query)
+    top = top_k(scores, k)
+    return top, scores[top]
+
+
+class IVFIndex:
+    """
+    Inverted-file index: k-means lists + exact re-rank of probed lists.
+    
+    Args:
+        embeddings: (n, dim) unit-norm vectors (ndarray or memmap)
+        n_lists: Number of k-means lists (default ~sqrt(n))
+        n_probe: Lists scanned per query (higher = better recall, slower)
+        iterations: k-means iterations
+        sample: Max vectors used to train the centroids
+        seed: RNG seed for sampling / initialization
+    """
+    
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        iterations: int = 10,
+        sample: int = 65536,
+        seed: int = 0
+    ):
+        self.embeddings = embeddings
+        n = len(embeddings)
+        if n_lists is None:
+            n_lists = int(np.sqrt(n))
+        self.n_lists = max(1, min(n_lists, n))
+        self.n_probe = n_probe
+        
+        rng = np.random.default_rng(seed)
+        self.centroids = self._train(rng, iterations, sample)
+        
+        # Members of list i are order[offsets[i]:offsets[i + 1]], row order
+        assignment = self._assign(embeddings)
+        self.order = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=self.n_lists), out=self.offsets[1:])
+    
+    def __len__(self) -> int:
+        return len(self.embeddings)
+    
+    def _train(self, rng: np.random.Generator, iterations: int, sample: int) -> np.ndarray:
+        """Spherical k-means on a random sample of the corpus"""
+        n = len(self.embeddings)
+        rows = np.sort(rng.choice(n, size=min(n, max(sample, self.n_lists)), replace=False))
+        data = np.asarray(self.embeddings[rows], dtype=np.float32)
+        
+        centroids = data[rng.choice(len(data), size=self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, data)
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty lists keep their old centroid
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        return centroids
+    
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), _ASSIGN_BLOCK):
+            block = np.asarray(vectors[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+            assignment[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignment
+    
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> np.ndarray:
+        """Row ids in the n_probe lists closest to query"""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        scores = self.centroids @ query
+        if n_probe < self.n_lists:
+            probe = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        else:
+            probe = np.arange(self.n_lists)
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in probe])
+    
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 1,
+        n_probe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k by dot product.
+        
+        Returns:
+            (ids, scores) best first; scores are exact for returned ids
+        """
+        ids = self.candidates(query, n_probe)
+        if len(ids) == 0:
+            return ids, np.empty(0, dtype=np.float32)
+        ids.sort()  # ascending rows = sequential reads on a memmap
+        top, scores = exact_search(self.embeddings[ids], query, k)
+        return ids[top], scores
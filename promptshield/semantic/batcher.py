@@ -0,0 +1,185 @@
+"""
+Micro-Batching Scheduler
+
+Collects concurrent single-item calls into one batched call:
+- A batch closes at max_batch items or max_wait_ms after its first item,
+  whichever comes first
+- One background thread runs process(batch) and resolves every caller's
+  future; a failing batch fails all of its futures
+- Threads block on submit(item).result() (or batcher(item)); asyncio code
+  awaits batcher.submit_async(item) without blocking the event loop
+
+Usage:
+    batcher = MicroBatcher(methods.semantic_match_batch, max_batch=32, max_wait_ms=2)
+    matched, similarity = batcher("ignore all previous instructions")
+    matched, similarity = await batcher.submit_async(text)
+    batcher.stats()   # batch sizes, queueing delay
+"""
+
+import asyncio
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Batch concurrent calls to process(items) -> results (same length/order).
+    
+    Args:
+        process: Batched function, called from the worker thread only
+        max_batch: Max items per call
+        max_wait_ms: Max time the first item of a batch waits for company
+        name: Worker thread name
+    """
+    
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Sequence[Any]],
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+        name: str = "promptshield-batcher"
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reset_stats()
+        
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+    
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the future resolves to its result"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, future, time.perf_counter()))
+        return future
+    
+    def submit_async(self, item: Any) -> "asyncio.Future":
+        """Awaitable result for asyncio callers"""
+        return asyncio.wrap_future(self.submit(item))
+    
+    def __call__(self, item: Any) -> Any:
+        """Blocking single-item call"""
+        return self.submit(item).result()
+    
+    def close(self, timeout: float = None):
+        """Finish queued items and stop the worker"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    # ---------- worker ----------
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        entry = self._queue.get(timeout=remaining)
+                    else:
+                        entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            
+            self._run_batch(batch)
+    
+    def _run_batch(self, batch: List):
+        started = time.perf_counter()
+        live = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if live:
+            try:
+                results = self.process([item for item, _, _ in live])
+                if len(results) != len(live):
+                    raise RuntimeError(
+                        f"Batched call returned {len(results)} results for {len(live)} items"
+                    )
+            except BaseException as e:
+                for _, future, _ in live:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(live, results):
+                    future.set_result(result)
+        self._record(batch, started, time.perf_counter())
+    
+    # ---------- metrics ----------
+    
+    def _reset_stats(self):
+        self._batches = 0
+        self._items = 0
+        self._max_size = 0
+        self._sizes = collections.Counter()
+        self._process_s = 0.0
+        self._delays = collections.deque(maxlen=4096)
+    
+    def _record(self, batch: List, started: float, finished: float):
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._max_size = max(self._max_size, len(batch))
+            self._sizes[len(batch)] += 1
+            self._process_s += finished - started
+            self._delays.extend(started - queued for _, _, queued in batch)
+    
+    def stats(self) -> Dict:
+        """Batch size and queueing delay (submit -> batch start) metrics"""
+        with self._lock:
+            delays = sorted(self._delays)
+            
+            def delay_ms(q: float) -> float:
+                if not delays:
+                    return 0.0
+                return delays[min(len(delays) - 1, int(q * len(delays)))] * 1000
+            
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "pending": self._queue.qsize(),
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_size,
+                "batch_sizes": dict(sorted(self._sizes.items())),
+                "avg_queue_ms": sum(delays) / len(delays) * 1000 if delays else 0.0,
+                "p50_queue_ms": delay_ms(0.50),
+                "p99_queue_ms": delay_ms(0.99),
+                "avg_batch_ms": self._process_s / self._batches * 1000 if self._batches else 0.0,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_ms,
+            }
+    
+    def reset_stats(self):
+        with self._lock:
+            self._reset_stats()
@@ -0,0 +1,193 @@
+"""
+Persistent Attack Embedding Cache
+
+Attack embeddings stored as .npy files, one per (model, corpus), and
+memory-mapped read-only on load:
+- Unchanged corpus: one hash over the texts, then np.load(mmap_mode="r");
+  no encoding, and every worker shares the same page-cache pages
+- Changed corpus: rows of texts seen before are copied from the newest
+  cached file; only added or edited texts are encoded
+- Writes go to a temp file and os.replace(), so readers never see a
+  partial file
+
+Usage:
+    cache = EmbeddingCache("~/.cache/promptshield/embeddings", "all-MiniLM-L6-v2")
+    embeddings = cache.load(attack_texts, encode)   # (n, dim) float32, read-only
+    cache.last_load  # {"cached": ..., "encoded": ..., "path": ...}
+"""
+
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_KEY_BYTES = 16
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=_KEY_BYTES).hexdigest()
+
+
+def corpus_key(texts: Sequence[str]) -> str:
+    """Hash of the whole corpus, order included"""
+    return _digest("\0".join(texts).encode("utf-8", "surrogatepass"))
+
+
+def text_keys(texts: Sequence[str]) -> np.ndarray:
+    """(n, 16) uint8 per-text hashes, stored next to the embeddings"""
+    keys = np.empty((len(texts), _KEY_BYTES), dtype=np.uint8)
+    for i, text in enumerate(texts):
+        keys[i] = np.frombuffer(
+            hashlib.blake2b(
+                text.encode("utf-8", "surrogatepass"), digest_size=_KEY_BYTES
+            ).digest(),
+            dtype=np.uint8
+        )
+    return keys
+
+
+class EmbeddingCache:
+    """
+    Embeddings of one model, cached per corpus under cache_dir.
+    
+    Files live in a directory named after the model plus a hash of its
+    name, so models never share rows:
+        <cache_dir>/<model>-<hash>/<corpus hash>.npy       (n, dim) float32
+        <cache_dir>/<model>-<hash>/<corpus hash>.keys.npy  (n, 16) text hashes
+    Only the `keep` most recent corpora are kept.
+    """
+    
+    def __init__(self, cache_dir: str, model_name: str, keep: int = 2):
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)[-48:]
+        self.directory = (
+            Path(cache_dir).expanduser() / f"{slug}-{_digest(model_name.encode())[:12]}"
+        )
+        self.keep = keep
+        self.last_load: Dict = {}
+    
+    def load(
+        self,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Embeddings for texts, in order, as a read-only memmap.
+        
+        Args:
+            texts: Attack corpus
+            encode: Model call for texts not in the cache; must return
+                an (len(texts), dim) array
+        """
+        start = time.perf_counter()
+        texts = list(texts)
+        path = self.directory / f"{corpus_key(texts)}.npy"
+        
+        embeddings = self._open(path, len(texts))
+        if embeddings is not None:
+            self._report(path, len(texts), 0, start)
+            return embeddings
+        
+        keys = text_keys(texts)
+        previous = self._newest()
+        rows: Dict[bytes, int] = {}
+        if previous is not None:
+            for row, key in enumerate(previous[1]):
+                rows.setdefault(key.tobytes(), row)
+        
+        cached = [(i, rows.get(key.tobytes())) for i, key in enumerate(keys)]
+        missing = [i for i, row in cached if row is None]
+        encoded = None
+        if missing:
+            encoded = np.asarray(encode([texts[i] for i in missing]), dtype=np.float32)
+            if previous is not None and encoded.shape[1] != previous[0].shape[1]:
+                # Same name, different model output: nothing can be reused
+                previous = None
+                missing = list(range(len(texts)))
+                encoded = np.asarray(encode(texts), dtype=np.float32)
+        
+        if encoded is not None:
+            dim = encoded.shape[1]
+        elif previous is not None:
+            dim = previous[0].shape[1]
+        else:
+            dim = 0
+        
+        result = np.empty((len(texts), dim), dtype=np.float32)
+        if previous is not None:
+            hits = [(i, row) for i, row in cached if row is not None]
+            if hits:
+                index, source = (np.asarray(x, dtype=np.int64) for x in zip(*hits))
+                result[index] = previous[0][source]
+        if encoded is not None:
+            result[missing] = encoded
+        
+        self._write(path, result, keys)
+        self._report(path, len(texts) - len(missing), len(missing), start)
+        return np.load(path, mmap_mode="r")
+    
+    def _open(self, path: Path, count: int) -> Optional[np.ndarray]:
+        """Memory-map a cached file, or None if missing or unusable"""
+        try:
+            embeddings = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if embeddings.ndim != 2 or embeddings.shape[0] != count:
+            return None
+        return embeddings
+    
+    def _newest(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(embeddings, keys) of the most recently written corpus"""
+        for path in self._corpora():
+            keys_path = path.with_suffix(".keys.npy")
+            try:
+                embeddings = np.load(path, mmap_mode="r")
+                keys = np.load(keys_path, mmap_mode="r")
+            except (OSError, ValueError):
+                continue
+            if embeddings.ndim == 2 and len(keys) == len(embeddings):
+                return embeddings, keys
+        return None
+    
+    def _corpora(self) -> List[Path]:
+        """Cached corpus files, newest first"""
+        try:
+            paths = [
+                p for p in self.directory.glob("*.npy")
+                if not p.name.endswith(".keys.npy")
+            ]
+        except OSError:
+            return []
+        return sorted(paths, key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    
+    def _write(self, path: Path, embeddings: np.ndarray, keys: np.ndarray):
+        """Atomically write embeddings + keys, then prune old corpora"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        keys_path = path.with_suffix(".keys.npy")
+        
+        # Keys first: a corpus file is only used once its keys exist
+        for target, array in ((keys_path, keys), (path, embeddings)):
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, target)
+        
+        for old in self._corpora()[self.keep:]:
+            # Workers that mapped an old file keep their pages (POSIX)
+            for stale in (old, old.with_suffix(".keys.npy")):
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+    
+    def _report(self, path: Path, cached: int, encoded: int, start: float):
+        self.last_load = {
+            "path": str(path),
+            "cached": cached,
+            "encoded": encoded,
+            "load_ms": (time.perf_counter() - start) * 1000,
+        }
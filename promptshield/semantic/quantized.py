@@ -0,0 +1,114 @@
+"""
+Quantized Attack Embedding Store
+
+Holds attack embeddings as float16 (2x smaller) or symmetric int8 with one
+float32 scale per row (~4x smaller), and searches in two steps:
+- Scan: approximate similarities computed on the quantized rows, a small
+  block at a time through a float32 buffer, so no full-size float copy
+  is ever made
+- Re-rank (optional): the best `rerank` candidates are re-scored with
+  exact float32 dot products against the source embeddings
+
+The source is only kept referenced when re-ranking is enabled; with
+rerank=0 the store drops it and returns the approximate scores. Enable
+re-ranking when the source is the memory-mapped embedding cache: just the
+re-ranked rows are paged in, so resident memory stays the quantized copy.
+
+Usage:
+    store = QuantizedEmbeddings(embeddings, dtype="int8")
+    store = QuantizedEmbeddings(mmap_embeddings, dtype="int8", rerank=32)
+    ids, scores = store.search(query_vec, k=1)
+    results = store.search_many(query_vecs, k=1)   # [(ids, scores), ...]
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .ann import exact_search, top_k
+
+QUANTIZATIONS = ("float16", "int8")
+
+# Rows converted to float32 per step; small enough to stay in cache
+_SCAN_BLOCK = 256
+
+
+class QuantizedEmbeddings:
+    """
+    Quantized copy of (n, dim) embeddings, optionally re-ranked exactly.
+    
+    Args:
+        embeddings: Float embeddings (ndarray or memmap)
+        dtype: "float16" or "int8"
+        rerank: Candidates re-scored exactly per query (recall knob); 0
+            drops the float source once quantized
+    """
+    
+    def __init__(self, embeddings: np.ndarray, dtype: str = "int8", rerank: int = 0):
+        if dtype not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {dtype} (expected one of {QUANTIZATIONS})")
+        self.source: Optional[np.ndarray] = embeddings if rerank > 0 else None
+        self.dtype = dtype
+        self.rerank = rerank
+        self.scales: Optional[np.ndarray] = None
+        
+        if dtype == "float16":
+            self.data = np.asarray(embeddings, dtype=np.float16)
+        else:
+            self.data = np.empty(embeddings.shape, dtype=np.int8)
+            self.scales = np.empty(len(embeddings), dtype=np.float32)
+            for start in range(0, len(embeddings), 16384):
+                block = np.asarray(embeddings[start:start + 16384], dtype=np.float32)
+                scale = np.abs(block).max(axis=1) / 127
+                scale[scale == 0] = 1.0
+                self.scales[start:start + len(block)] = scale
+                self.data[start:start + len(block)] = np.rint(block / scale[:, None])
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    @property
+    def nbytes(self) -> int:
+        """Resident size of the quantized data (excludes the source)"""
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+    
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate similarities on the quantized rows.
+        
+        Args:
+            queries: (dim,) or (dim, b) float32
+        
+        Returns:
+            (n,) or (n, b) float32
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(self.data)
+        out = np.empty((n,) + queries.shape[1:], dtype=np.float32)
+        buf = np.empty((min(_SCAN_BLOCK, n), self.data.shape[1]), dtype=np.float32)
+        for start in range(0, n, _SCAN_BLOCK):
+            rows = min(_SCAN_BLOCK, n - start)
+            np.copyto(buf[:rows], self.data[start:start + rows], casting="unsafe")
+            np.dot(buf[:rows], queries, out=out[start:start + rows])
+        if self.scales is not None:
+            out *= self.scales if out.ndim == 1 else self.scales[:, None]
+        return out
+    
+    def search(self, query: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (ids, scores), best first; scores are exact when re-ranking"""
+        return self._rerank(self.scores(query), query, k)
+    
+    def search_many(self, queries: np.ndarray, k: int = 1) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for (b, dim) queries with one scan over the data"""
+        queries = np.asarray(queries, dtype=np.float32)
+        approx = self.scores(queries.T)
+        return [self._rerank(approx[:, i], query, k) for i, query in enumerate(queries)]
+    
+    def _rerank(self, approx: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.source is None:
+            ids = top_k(approx, k)
+            return ids, approx[ids]
+        ids = top_k(approx, max(k, self.rerank))
+        ids.sort()  # ascending rows = sequential reads on a memmap
+        top, scores = exact_search(self.source[ids], query, k)
+        return ids[top], scores
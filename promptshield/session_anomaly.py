@@ -11,7 +11,9 @@ Patterns detected:
 
 import time
 from collections import defaultdict
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+
+from .analyzed_text import AnalyzedText
 
 
 class SessionAnomalyDetector:
@@ -67,7 +69,7 @@ class SessionAnomalyDetector:
     def analyze(
         self,
         user_id: str,
-        message: str,
+        message: Union[str, AnalyzedText],
         shield_result: Dict
     ) -> Dict:
         """
@@ -75,7 +77,7 @@ class SessionAnomalyDetector:
         
         Args:
             user_id: Unique user identifier
-            message: Current message
+            message: Current message (str or the request's AnalyzedText)
             shield_result: Result from shield check (with threat_level)
         
         Returns:
@@ -98,10 +100,12 @@ class SessionAnomalyDetector:
                 "warnings": []
             }
         
-        # Add to history
+        # Add to history (lowercased once here, not on every analyze)
+        analyzed = AnalyzedText.of(message)
         history = self.session_history[user_id]
         history.append({
-            "message": message[:200],  # Store first 200 chars
+            "message": analyzed.text[:200],  # Store first 200 chars
+            "message_lower": analyzed.lower[:200],
             "timestamp": time.time(),
             "threat_level": shield_result.get("threat_level", 0),
             "blocked": shield_result.get("blocked", False)
@@ -236,8 +240,8 @@ class SessionAnomalyDetector:
             return {"detected": False, "score": 0, "description": ""}
         
         # Combine recent messages
-        recent_messages = [h["message"] for h in history[-3:]]
-        combined = " ".join(recent_messages).lower()
+        recent_messages = [h["message_lower"] for h in history[-3:]]
+        combined = " ".join(recent_messages)
         
         # Check for split attack patterns
         split_patterns = [
@@ -5,10 +5,15 @@ PyTorch-style composable security shields.
 Replace fixed levels (L1/L3/L5/L7) with flexible component composition.
 """
 
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Callable, Tuple, Union
+from contextlib import nullcontext
 from dataclasses import dataclass
 import time
 
+from .analyzed_text import AnalyzedText
+from .latency_budget import LatencyBudget, StageCostEstimator
+from .prediction_cache import PredictionCache
+
 
 @dataclass
 class ShieldResult:
@@ -46,7 +51,10 @@ class ShieldComponent:
         
         Args:
             text: Text to check
-            **context: Additional context (user_id, session_id, etc.)
+            **context: Additional context (user_id, session_id, etc.).
+                Shield passes `analyzed`, the request's AnalyzedText: use
+                its views (analyzed.lower, analyzed.word_set(3), ...) and
+                analyzed.derive() instead of re-processing `text`.
         
         Returns:
             ShieldResult
@@ -132,11 +140,23 @@ class Shield:
         # Pattern matching
         patterns: bool = True,
         pattern_db: Optional[str] = None,
+        pattern_mode: str = "early_exit",  # "early_exit" | "full"
+        pattern_pack: Optional[str] = None,
+        pattern_fuzzy_index: str = "token",  # "token" | "minhash"
+        
+        # Input sanitation
+        sanitize: bool = False,
+        decode_payloads: bool = True,
         
         # ML models
         models: Optional[List[str]] = None,
         model_threshold: float = 0.7,
         
+        # Cascade (cheap tiers settle clear cases before ML)
+        cascade: bool = False,
+        cascade_band: Tuple[float, Optional[float]] = (0.2, None),
+        allowlist: Optional[Iterable[str]] = None,
+        
         # Security features
         canary: bool = False,
         canary_mode: str = "crypto",  # "simple" | "crypto"
@@ -155,6 +175,9 @@ class Shield:
         
         # Performance
         cache_predictions: bool = True,
+        cache_size: int = 10000,
+        cache_ttl: Optional[float] = 300.0,
+        deadline_ms: Optional[float] = None,
         async_mode: bool = False,
         
         # Custom components
@@ -168,8 +191,28 @@ class Shield:
         Args:
             patterns: Enable pattern matching
             pattern_db: Custom pattern database path
+            pattern_mode: "early_exit" stops at the first decisive pattern,
+                "full" scores every pattern (exact rule attribution)
+            pattern_pack: Precompiled pattern pack (promptshield-compile)
+                to memory-map instead of parsing pattern_db
+            pattern_fuzzy_index: "minhash" finds near-duplicate attack
+                prompts through MinHash LSH (for very large pattern DBs)
+            sanitize: Normalize (NFKC, zero-width, whitespace) and decode
+                (URL, base64) the input before any check runs
+            decode_payloads: Also pattern-match payloads decoded from
+                encoded spans (base64, %XX, hex, \\uXXXX, rot13)
             models: List of ML models to use
             model_threshold: Confidence threshold for ML
+            cascade: Run ML only for inputs whose cheap-tier score
+                (max of pattern score and complexity_score) falls in
+                cascade_band; responses record the deciding tier in
+                "decided_by"
+            cascade_band: (benign_below, malicious_from). Cheap scores
+                below benign_below are allowed without ML; scores at or
+                above malicious_from (None = never) are blocked without
+                ML. See calibrate_cascade()
+            allowlist: Known-safe inputs (compared after normalization,
+                case-insensitive) that skip pattern and ML checks
             canary: Enable canary tokens
             canary_mode: "simple" or "crypto"
             rate_limiting: Enable adaptive rate limiting
@@ -179,15 +222,29 @@ class Shield:
             pii_detection: Enable PII detection
             pii_redaction: Redaction mode
             verify_models: Verify model signatures
-            cache_predictions: Cache ML predictions
+            cache_predictions: Cache pattern and ML results per input
+                (keyed by input hash + pattern/model versions)
+            cache_size: Max cached inputs per stage (LRU eviction)
+            cache_ttl: Seconds a cached result stays valid (None = no expiry)
+            deadline_ms: Default per-request latency budget; optional stages
+                whose estimated cost no longer fits are skipped and the
+                response is marked "degraded" (None = no budget)
             async_mode: Enable async operations
             custom_components: List of custom component names
         """
         self.config = {
             "patterns": patterns,
             "pattern_db": pattern_db or "promptshield/attack_db",
+            "pattern_mode": pattern_mode,
+            "pattern_pack": pattern_pack,
+            "pattern_fuzzy_index": pattern_fuzzy_index,
+            "sanitize": sanitize,
+            "decode_payloads": decode_payloads,
             "models": models or [],
             "model_threshold": model_threshold,
+            "cascade": cascade,
+            "cascade_band": tuple(cascade_band),
+            "allowlist": list(allowlist or []),
             "canary": canary,
             "canary_mode": canary_mode,
             "rate_limiting": rate_limiting,
@@ -198,6 +255,9 @@ class Shield:
             "pii_redaction": pii_redaction,
             "verify_models": verify_models,
             "cache_predictions": cache_predictions,
+            "cache_size": cache_size,
+            "cache_ttl": cache_ttl,
+            "deadline_ms": deadline_ms,
             "async_mode": async_mode,
             **kwargs
         }
@@ -205,6 +265,7 @@ class Shield:
         # Initialize ML attributes (must be before _build_pipeline)
         self.models = {}
         self.vectorizer = None
+        self.model_versions = ()
         
         # Build component pipeline
         self.components = []
@@ -237,7 +298,10 @@ class Shield:
             # If pattern_db is the old hardcoded path, use package-relative path
             if pattern_db == "promptshield/attack_db":
                 pattern_db = os.path.join(pkg_dir, "attack_db")
-            self.pattern_manager = PatternManager(pattern_db)
+            self.pattern_manager = PatternManager(
+                pattern_db, pack_path=self.config["pattern_pack"],
+                fuzzy_index=self.config["pattern_fuzzy_index"]
+            )
         
         # 3. Session anomaly detection
         if self.config["session_tracking"]:
@@ -271,7 +335,18 @@ class Shield:
     
     def _init_subsystems(self):
         """Initialize subsystems (caching, async, etc.)"""
-        self.prediction_cache = {} if self.config["cache_predictions"] else None
+        from .methods import normalize_text
+        self.allowlist = frozenset(
+            normalize_text(text).lower() for text in self.config["allowlist"]
+        )
+        self.prediction_cache = (
+            PredictionCache(
+                max_size=self.config["cache_size"],
+                ttl_seconds=self.config["cache_ttl"]
+            )
+            if self.config["cache_predictions"] else None
+        )
+        self.stage_costs = StageCostEstimator()
         
     def _load_ml_models(self):
         """Load configured ML models"""
@@ -318,22 +393,184 @@ class Shield:
                         self.models[model_name] = {
                             "model": loaded_model,
                             "type": "sklearn",
-                            "status": "active"
+                            "status": "active",
+                            "version": self._file_version(model_path)
                         }
                     else:
                         print(f"⚠️  Model file not found: {fname}")
                         
             except Exception as e:
                 print(f"⚠️  Failed to load model {model_name}: {e}")
+        
+        # Cached ML scores are only valid for these exact files
+        self.model_versions = (self._file_version(vec_path),) + tuple(
+            (name, data.get("version")) for name, data in sorted(self.models.items())
+        )
+    
+    @staticmethod
+    def _file_version(path: str) -> str:
+        """Size + mtime fingerprint of a model file"""
+        import os
+        st = os.stat(path)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+    
+    def _cached(
+        self,
+        stage: str,
+        analyzed: AnalyzedText,
+        versions: Tuple[Hashable, ...],
+        compute: Callable[[], Any],
+        budget: LatencyBudget,
+        on_hit: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        compute() through the prediction cache (if enabled). compute
+        times its own work into the budget; results computed while the
+        budget skipped or downgraded something are not cached. on_hit is
+        called with a value served from the cache.
+        """
+        if self.prediction_cache is None:
+            return compute()
+        key = PredictionCache.make_key(stage, analyzed.text, *versions)
+        value = self.prediction_cache.get(key)
+        if value is None:
+            degraded = len(budget.skipped_stages) + len(budget.downgraded_stages)
+            value = compute()
+            if len(budget.skipped_stages) + len(budget.downgraded_stages) == degraded:
+                self.prediction_cache.put(key, value)
+        elif on_hit is not None:
+            on_hit(value)
+        return value
+    
+    def _match_patterns(
+        self,
+        analyzed: AnalyzedText,
+        mode: Optional[str] = None,
+        budget: Optional[LatencyBudget] = None
+    ) -> Tuple[bool, float, Optional[str], bool, float, Tuple[str, ...]]:
+        """
+        Pattern stage: raw input, then payloads decoded from encoded spans
+        (skipped if the budget has no room for it). With a budget, the two
+        matches are timed as "patterns" and "decoded_patterns".
+        
+        Returns:
+            (matched, score, rule, decoded, threat_level, hit_ids); hit_ids
+            are the pattern hits both matches counted, replayed on cache hits
+        """
+        mode = mode or self.config["pattern_mode"]
+        hit_ids = []
+        with budget.track("patterns") if budget is not None else nullcontext():
+            matched, score, rule = self.pattern_manager.match(
+                analyzed, mode=mode, hit_ids=hit_ids
+            )
+        threat_level = score
+        decoded = False
+        
+        # Encoded payloads: match only what their spans decode to
+        if (not matched and self.config["decode_payloads"]
+                and analyzed.decoded_spans
+                and (budget is None or budget.allows("decoded_patterns"))):
+            with budget.track("decoded_patterns") if budget is not None else nullcontext():
+                matched, score, rule = self.pattern_manager.match(
+                    "\n".join(analyzed.decoded_spans), mode=mode, hit_ids=hit_ids
+                )
+            threat_level = max(threat_level, score)
+            decoded = matched
+        
+        return matched, score, rule, decoded, threat_level, tuple(hit_ids)
+    
+    def _replay_pattern_hits(self, cached: Tuple):
+        """Count a cached pattern result's hits as the uncached match did"""
+        self.pattern_manager.record_hits(cached[-1])
+    
+    def _is_allowlisted(self, analyzed: AnalyzedText) -> bool:
+        return bool(self.allowlist) and analyzed.normalized.lower() in self.allowlist
+    
+    def _cheap_score(self, analyzed: AnalyzedText, pattern_threat: float) -> float:
+        """Cascade tier score: pattern threat and structural complexity"""
+        from .methods import complexity_score
+        return max(pattern_threat, complexity_score(analyzed))
+    
+    def _finalize(self, result: Dict, decided_by: Optional[str], budget: LatencyBudget) -> Dict:
+        """
+        Add the deciding tier (cascade mode) and, when a deadline applies,
+        degraded / skipped_stages / downgraded_stages.
+        """
+        if self.config["cascade"]:
+            result["decided_by"] = decided_by
+        if budget.deadline_ms is not None:
+            result.update(budget.report())
+        return result
+    
+    def calibrate_cascade(self, samples: Iterable[str]) -> Dict:
+        """
+        Suggest cascade_band edges that keep decisions unchanged on samples.
+        
+        Runs the pattern and ML stages on every sample (no cache, no
+        cascade). Inputs settled by the allowlist or patterns never reach
+        ML and are ignored. Of the rest:
+        - benign_below: lowest cheap score of an input ML blocks, so every
+          ML block still reaches ML
+        - malicious_from: lowest cheap score above every input ML allows
+          (None if no such input), so early blocks are ones ML would make
+        
+        Args:
+            samples: Representative traffic (benign and malicious)
+        
+        Returns:
+            Dictionary with cascade_band and how many samples each tier settles
+        """
+        allowed, blocked = [], []
+        total = settled = 0
+        for text in samples:
+            total += 1
+            analyzed = AnalyzedText(text)
+            if self._is_allowlisted(analyzed):
+                settled += 1
+                continue
+            pattern_threat = 0.0
+            if self.config["patterns"]:
+                matched, _, _, _, pattern_threat, _ = self._match_patterns(analyzed)
+                if matched:
+                    settled += 1
+                    continue
+            cheap = self._cheap_score(analyzed, pattern_threat)
+            if self._check_ml_models(analyzed) >= self.config["model_threshold"]:
+                blocked.append(cheap)
+            else:
+                allowed.append(cheap)
+        
+        benign_below = min(blocked) if blocked else 1.0
+        highest_allowed = max(allowed, default=-1.0)
+        above = [cheap for cheap in blocked if cheap > highest_allowed]
+        malicious_from = min(above) if above else None
+        
+        cheap_scores = allowed + blocked
+        return {
+            "cascade_band": (benign_below, malicious_from),
+            "samples": total,
+            "settled_early": settled,
+            "ml_blocked": len(blocked),
+            "ml_skipped": sum(
+                1 for cheap in cheap_scores
+                if cheap < benign_below
+                or (malicious_from is not None and cheap >= malicious_from)
+            ),
+            "ml_run": sum(
+                1 for cheap in cheap_scores
+                if cheap >= benign_below
+                and (malicious_from is None or cheap < malicious_from)
+            ),
+        }
     
-    def _check_ml_models(self, text: str) -> float:
+    def _check_ml_models(self, text: Union[str, AnalyzedText]) -> float:
         """
         Check text against ML models with ensemble voting.
         
         Uses majority voting + probability averaging for robust predictions.
         
         Args:
-            text: Input text to analyze
+            text: Input text to analyze (str or AnalyzedText)
             
         Returns:
             Threat score (0.0 - 1.0)
@@ -342,8 +579,11 @@ class Shield:
             return 0.0
         
         try:
-            # Vectorize input
-            X = self.vectorizer.transform([text])
+            # Vectorize input (once per request, shared by all models)
+            analyzed = AnalyzedText.of(text)
+            X = analyzed.derive(
+                "tfidf", lambda: self.vectorizer.transform([analyzed.text])
+            )
             
             # Collect predictions from all models
             predictions = []
@@ -505,10 +745,11 @@ class Shield:
     
     def protect_input(
         self,
-        user_input: str,
+        user_input: Union[str, AnalyzedText],
         system_context: str,
         user_id: Optional[str] = None,
         session_id: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
         **context
     ) -> Dict:
         """
@@ -519,68 +760,148 @@ class Shield:
             system_context: System prompt/context
             user_id: User identifier (for rate limiting)
             session_id: Session identifier (for tracking)
+            deadline_ms: Latency budget for this call (default: the
+                shield's deadline_ms). Rate limiting, the raw pattern
+                match and canary generation always run; decoded-payload
+                matching, ML, custom components and session tracking are
+                skipped when their estimated cost no longer fits
             **context: Additional context
         
         Returns:
             Dictionary with protection result
         """
         start_time = time.time()
+        budget = LatencyBudget(
+            deadline_ms if deadline_ms is not None else self.config["deadline_ms"],
+            self.stage_costs
+        )
+        
+        # Every stage reads the same lazily computed views of the input
+        analyzed = AnalyzedText.of(user_input)
+        
+        # 0. Sanitation: later stages check the normalized, decoded text
+        if self.config["sanitize"]:
+            analyzed = AnalyzedText(analyzed.sanitized)
         
         # 1. Rate limiting check
         if self.config["rate_limiting"] and user_id:
             rate_result = self.rate_limiter.check_limit(user_id, threat_level=0.0)
             if not rate_result["allowed"]:
-                return {
+                return self._finalize({
                     "blocked": True,
                     "reason": "rate_limit_exceeded",
                     "retry_after": rate_result["retry_after"],
                     "metadata": {"component": "rate_limiter"}
-                }
+                }, "rate_limiter", budget)
+        
+        # Known-safe inputs skip the detection stages
+        allowlisted = self._is_allowlisted(analyzed)
+        if allowlisted:
+            decided_by = "allowlist"
+        else:
+            decided_by = "patterns" if self.config["patterns"] else None
         
-        # 2. Pattern matching
+        # 2. Pattern matching (over budget: "full" falls back to "early_exit")
         threat_level = 0.0
-        if self.config["patterns"]:
-            matched, score, rule = self.pattern_manager.match(user_input)
-            threat_level = max(threat_level, score)
+        if self.config["patterns"] and not allowlisted:
+            manager = self.pattern_manager
+            mode = self.config["pattern_mode"]
+            if mode == "full" and not budget.fits("patterns"):
+                mode = "early_exit"
+                budget.downgrade("patterns")
+            
+            matched, score, rule, decoded, pattern_threat, _ = self._cached(
+                "patterns", analyzed, (mode, manager.version, manager.last_reload),
+                lambda: self._match_patterns(analyzed, mode, budget), budget,
+                on_hit=self._replay_pattern_hits
+            )
+            threat_level = max(threat_level, pattern_threat)
             
             if matched:
-                return {
+                return self._finalize({
                     "blocked": True,
                     "reason": "pattern_match",
                     "rule": rule,
                     "threat_level": score,
-                    "metadata": {"component": "pattern_matcher"}
-                }
-        
-        # 3. ML model prediction
-        if self.config["models"]:
-            ml_threat = self._check_ml_models(user_input)
+                    "metadata": {"component": "pattern_matcher", "decoded": decoded}
+                }, "patterns", budget)
+        
+        # 3. ML model prediction (cascade: only for the uncertain band)
+        run_ml = bool(self.config["models"]) and not allowlisted
+        if run_ml and self.config["cascade"]:
+            cheap_score = self._cheap_score(analyzed, threat_level)
+            benign_below, malicious_from = self.config["cascade_band"]
+            
+            if malicious_from is not None and cheap_score >= malicious_from:
+                return self._finalize({
+                    "blocked": True,
+                    "reason": "cascade_threshold",
+                    "threat_level": cheap_score,
+                    "metadata": {"component": "cascade"}
+                }, "cheap", budget)
+            
+            if cheap_score < benign_below:
+                run_ml = False
+                decided_by = "cheap"
+        
+        if run_ml and budget.allows("ml"):
+            decided_by = "ml"
+            ml_threat = self._cached(
+                "ml", analyzed, self.model_versions,
+                lambda: budget.run("ml", lambda: self._check_ml_models(analyzed)),
+                budget
+            )
             threat_level = max(threat_level, ml_threat)
             
             if ml_threat >= self.config["model_threshold"]:
-                return {
+                return self._finalize({
                     "blocked": True,
                     "reason": "ml_detection",
                     "threat_level": ml_threat,
                     "metadata": {"component": "ml_model"}
-                }
-        
-        # 4. Session anomaly detection
-        if self.config["session_tracking"] and session_id:
-            shield_result = {"threat_level": threat_level, "blocked": False}
-            session_result = self.session_detector.analyze(
-                session_id, user_input, shield_result
+                }, "ml", budget)
+        
+        # 4. Custom components
+        for component in self.components:
+            if not component.enabled or not budget.allows(component.name):
+                continue
+            component_start = time.time()
+            with budget.track(component.name):
+                result = component.check(
+                    analyzed.text, analyzed=analyzed,
+                    user_id=user_id, session_id=session_id, **context
+                )
+            component._track_metrics(
+                result.blocked, (time.time() - component_start) * 1000
             )
+            threat_level = max(threat_level, result.threat_level)
+            
+            if result.blocked:
+                return self._finalize({
+                    "blocked": True,
+                    "reason": result.reason or component.name,
+                    "threat_level": result.threat_level,
+                    "metadata": {"component": component.name, **result.metadata}
+                }, component.name, budget)
+        
+        # 5. Session anomaly detection
+        if (self.config["session_tracking"] and session_id
+                and budget.allows("session_anomaly")):
+            shield_result = {"threat_level": threat_level, "blocked": False}
+            with budget.track("session_anomaly"):
+                session_result = self.session_detector.analyze(
+                    session_id, analyzed, shield_result
+                )
             
             if session_result["action"] == "block_session":
-                return {
+                return self._finalize({
                     "blocked": True,
                     "reason": session_result["reason"],
                     "session_threat": session_result["session_threat"],
                     "metadata": {"component": "session_anomaly"}
-                }
+                }, "session_anomaly", budget)
         
-        # 5. Generate canary (if enabled)
+        # 6. Generate canary (if enabled)
         canary_data = None
         secured_context = system_context
         
@@ -603,7 +924,7 @@ class Shield:
         
         latency_ms = (time.time() - start_time) * 1000
         
-        return {
+        return self._finalize({
             "blocked": False,
             "secured_context": secured_context,
             "canary": canary_data,
@@ -612,7 +933,7 @@ class Shield:
             "metadata": {
                 "components_executed": self._get_active_components()
             }
-        }
+        }, decided_by, budget)
     
     def protect_output(
         self,
@@ -620,6 +941,7 @@ class Shield:
         canary: Optional[Dict] = None,
         user_id: Optional[str] = None,
         user_input: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
         **context
     ) -> Dict:
         """
@@ -630,12 +952,19 @@ class Shield:
             canary: Canary data from protect_input
             user_id: User identifier
             user_input: Original user input (for PII context)
+            deadline_ms: Latency budget for this call (default: the
+                shield's deadline_ms). The canary check always runs; PII
+                detection is skipped when its estimated cost no longer fits
             **context: Additional context
         
         Returns:
             Dictionary with protection result
         """
         start_time = time.time()
+        budget = LatencyBudget(
+            deadline_ms if deadline_ms is not None else self.config["deadline_ms"],
+            self.stage_costs
+        )
         
         # 1. Canary leak detection
         if self.config["canary"] and canary:
@@ -644,22 +973,22 @@ class Shield:
                 is_leaked, reason = verify_canary_leak(model_output, canary)
                 
                 if is_leaked:
-                    return {
+                    return self._finalize({
                         "blocked": True,
                         "reason": f"canary_leak:{reason}",
                         "metadata": {"component": "canary_detector"}
-                    }
+                    }, "canary_detector", budget)
             else:
                 from .methods import detect_canary
                 if detect_canary(model_output, canary.get("canary", "")):
-                    return {
+                    return self._finalize({
                         "blocked": True,
                         "reason": "canary_leak",
                         "metadata": {"component": "canary_detector"}
-                    }
+                    }, "canary_detector", budget)
         
         # 2. PII detection
-        if self.config["pii_detection"]:
+        if self.config["pii_detection"] and budget.allows("pii_detector"):
             from .pii import PIIContext, smart_redact
             from .pii.contextual_detector import extract_user_pii
             
@@ -670,15 +999,16 @@ class Shield:
                 user_provided_pii=user_pii
             )
             
-            result = self.pii_detector.scan_and_classify(model_output, pii_context)
+            with budget.track("pii_detector"):
+                result = self.pii_detector.scan_and_classify(model_output, pii_context)
             
             if result["action"] == "block":
-                return {
+                return self._finalize({
                     "blocked": True,
                     "reason": "pii_leak_critical",
                     "summary": result["summary"],
                     "metadata": {"component": "pii_detector"}
-                }
+                }, "pii_detector", budget)
             
             elif result["action"] == "warn":
                 # Redact and allow
@@ -686,32 +1016,28 @@ class Shield:
                 
                 latency_ms = (time.time() - start_time) * 1000
                 
-                return {
+                return self._finalize({
                     "blocked": False,
                     "output": redacted_output,
                     "redacted": True,
                     "pii_summary": result["summary"],
                     "latency_ms": latency_ms,
                     "metadata": {"component": "pii_detector"}
-                }
+                }, "pii_detector", budget)
         
         latency_ms = (time.time() - start_time) * 1000
         
-        return {
+        return self._finalize({
             "blocked": False,
             "output": model_output,
             "latency_ms": latency_ms
-        }
-    
-    def _check_ml_models(self, text: str) -> float:
-        """Check text against ML models"""
-        # TODO: Implement actual ML model loading and prediction
-        # For now, return 0 (not implemented yet)
-        return 0.0
+        }, None, budget)
     
     def _get_active_components(self) -> List[str]:
         """Get list of active components"""
         active = []
+        if self.config["sanitize"]:
+            active.append("sanitizer")
         if self.config["rate_limiting"]:
             active.append("rate_limiter")
         if self.config["patterns"]:
@@ -724,6 +1050,7 @@ class Shield:
             active.append("canary")
         if self.config["pii_detection"]:
             active.append("pii_detector")
+        active.extend(c.name for c in self.components if c.enabled)
         return active
     
     def get_stats(self) -> Dict:
@@ -743,6 +1070,11 @@ class Shield:
         if self.config["session_tracking"]:
             stats["session_detector"] = self.session_detector.get_global_stats()
         
+        if self.prediction_cache is not None:
+            stats["prediction_cache"] = self.prediction_cache.get_stats()
+        
+        stats["stage_costs"] = self.stage_costs.get_stats()
+        
         return stats
     
     # ============================================
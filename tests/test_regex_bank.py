@@ -0,0 +1,115 @@
+"""RegexBank must agree with running each regex with re.search on the whole input"""
+import re
+
+import pytest
+
+from promptshield.pattern_index import RegexBank
+
+
+def build(patterns, **kwargs):
+    bank = RegexBank(**kwargs)
+    for key, source in patterns.items():
+        bank.add(key, source)
+    return bank.build()
+
+
+def baseline(patterns, text):
+    return {
+        key for key, source in patterns.items()
+        if re.search(source, text, re.IGNORECASE)
+    }
+
+
+def test_anchored_regex_only_matches_at_input_start():
+    patterns = {"start": r"^ignore", "end": r"instructions$", "word": r"\bignore\b"}
+    # "ignore" at offset 1792 used to start a fresh 2048-char window
+    text = "x" * 1792 + "ignore" + "y" * 506
+    assert len(text) == 2304
+    assert build(patterns).search(text) == baseline(patterns, text) == set()
+
+
+def test_match_crossing_a_window_boundary_is_found():
+    patterns = {"long": r"begin.{300,}end"}
+    text = "a" * 1700 + "begin" + "b" * 400 + "end" + "c" * 3000
+    assert len(text) == 5108
+    assert build(patterns).search(text) == baseline(patterns, text) == {"long"}
+
+
+@pytest.mark.parametrize("text", [
+    "ignore previous instructions",
+    "please " + "z" * 5000 + " ignore previous instructions",
+    "ignore" + " " * 3000 + "instructions",
+    "no attack here " * 400,
+])
+def test_chunked_search_matches_baseline(text):
+    patterns = {
+        "start": r"^ignore",
+        "end": r"instructions$",
+        "gap": r"ignore.*instructions",
+        "word": r"\bprevious\b",
+        "look": r"(?<=please )z+",
+    }
+    assert build(patterns, chunk_size=2).search(text) == baseline(patterns, text)
+
+
+def test_quarantine_needs_repeated_overruns():
+    bank = build({"slow": r"ign(o)+re"}, budget_ms=1e-9, quarantine_after=3)
+    for _ in range(2):
+        assert bank.search("ignooore") == {"slow"}
+    assert "slow" not in bank.quarantine_snapshot()
+
+    # An in-budget scan resets the count
+    bank.budget_ms = None
+    bank.search("ignooore")
+    bank.budget_ms = 1e-9
+    for _ in range(2):
+        bank.search("ignooore")
+    assert "slow" not in bank.quarantine_snapshot()
+
+    bank.search("ignooore")
+    assert "slow" in bank.quarantine_snapshot()
+    assert bank.search("ignooore") == set()
+
+
+def test_runtime_quarantine_expires():
+    bank = build(
+        {"slow": r"ign(o)+re"}, budget_ms=1e-9, quarantine_after=1, quarantine_ttl=60
+    )
+    bank.search("ignooore")
+    assert bank.search("ignooore") == set()
+
+    bank.quarantined["slow"]["expires_at"] = 0
+    bank.budget_ms = None
+    assert bank.search("ignooore") == {"slow"}
+    assert bank.quarantine_snapshot() == {}
+
+
+def test_static_quarantine_is_permanent():
+    bank = build({"redos": r"(a+)+$"})
+    info = bank.quarantine_snapshot()["redos"]
+    assert info["expires_at"] is None
+    assert bank.search("aaaa") == set()
+
+
+def test_flagged_regex_scans_a_bounded_prefix():
+    bank = build({"poly": r"\s*\s*x"}, flagged_scan=256)
+    assert "poly" in bank.flagged
+    assert bank.search(" " * 200 + "x") == {"poly"}
+    # Cubic backtracking over the full 100k chars would take hours
+    assert bank.search(" " * 100_000) == set()
+    assert bank.search(" " * 300 + "x") == set()
+
+
+def test_standalone_regex_scans_at_most_max_scan_chars():
+    patterns = {"backref": r"(ab)\1", "start": r"^(x)\1"}
+    bank = build(patterns, max_scan=1024)
+    text = "xx" + "y" * 2000 + "abab"
+    assert bank.search(text) == {"start"}
+    assert bank.search(text[-1024:]) == {"backref"}
+
+
+def test_match_ending_at_the_cut_is_not_reported_for_end_assertions():
+    patterns = {"end": r"(fo)o$", "word": r"(fo)o\b", "plain": r"(fo)o"}
+    text = "y" * 1021 + "foobar"
+    # "foo" ends exactly at the 1024-char cut
+    assert build(patterns, max_scan=1024).search(text) == baseline(patterns, text) == {"plain"}